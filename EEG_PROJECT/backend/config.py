@@ -1,7 +1,26 @@
 # backend/config.py
 
 MODEL_PATH = "models/rf_model.pkl"
+DTYPE = "float32"  # numeric precision of the whole pipeline; "float64" to opt in
+CANONICAL_SFREQ = 256  # every recording is resampled to this rate
 LOW_CUTOFF = 1.0
 HIGH_CUTOFF = 40.0
 POWERLINE_FREQ = 50
-RISK_THRESHOLD = 0.6
\ No newline at end of file
+FILTER_ORDER = 4
+NOTCH_Q = 30.0
+NOTCH_HARMONICS = 3  # notch 50, 100, 150 Hz (those below Nyquist)
+RISK_THRESHOLD = 0.6
+
+# Artifact subspace reconstruction
+ASR_CUTOFF = 5.0  # robust SDs above calibration RMS before a component is removed
+ASR_WINDOW_SEC = 0.5
+ASR_CACHE_DIR = "cache/asr"
+
+# Parsed-recording cache (content addressed, LRU evicted)
+CACHE_ENABLED = True
+CACHE_DIR = "cache/recordings"
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# Memoized features (in-process LRU + optional on-disk tier)
+FEATURE_CACHE_SIZE = 128  # entries kept in memory
+FEATURE_CACHE_DIR = "cache/features"  # None disables the on-disk tier
@@ -0,0 +1,178 @@
+# backend/core/asr.py
+#
+# Artifact subspace reconstruction (ASR): components of short sliding
+# windows whose variance exceeds what was seen in clean calibration data
+# are removed and reconstructed from the remaining ones.
+
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal.windows import hann
+
+from config import ASR_CACHE_DIR, ASR_CUTOFF, ASR_WINDOW_SEC
+
+_calibrations = {}  # in-process cache: key -> calibration dict
+
+
+def _window_layout(sfreq, window_sec):
+    half = max(1, int(round(window_sec * sfreq / 2)))
+    return 2 * half, half  # window length, hop (50% overlap)
+
+
+def _windows(data, size, hop):
+    # (windows x channels x samples) strided view, no copy
+    return sliding_window_view(data, size, axis=-1)[:, ::hop].transpose(1, 0, 2)
+
+
+def _covariances(windows):
+    return windows @ windows.transpose(0, 2, 1) / windows.shape[-1]
+
+
+def calibrate(data, sfreq, cutoff=ASR_CUTOFF, window_sec=ASR_WINDOW_SEC):
+    """
+    Calibration from (mostly) clean, filtered (channels x samples) data.
+    Returns {"M": mixing matrix, "T": threshold matrix}.
+    """
+    size, hop = _window_layout(sfreq, window_sec)
+    windows = _windows(np.asarray(data, dtype=np.float64), size, hop)
+    if len(windows) < 2:
+        raise ValueError("❌ Not enough calibration data for ASR")
+
+    cov = np.median(_covariances(windows), axis=0)  # robust to artifact windows
+    evals, evecs = np.linalg.eigh(cov)
+    mixing = (evecs * np.sqrt(np.maximum(evals, 0))) @ evecs.T
+
+    _, basis = np.linalg.eigh(mixing)
+    rms = np.sqrt(np.mean(np.einsum("cd,wcs->wds", basis, windows) ** 2, axis=-1))
+    median = np.median(rms, axis=0)
+    spread = 1.4826 * np.median(np.abs(rms - median), axis=0)
+    thresholds = median + cutoff * spread
+    return {"M": mixing, "T": thresholds[:, None] * basis.T}
+
+
+def get_calibration(session, data=None, sfreq=None, cache_dir=ASR_CACHE_DIR,
+                    cutoff=ASR_CUTOFF, window_sec=ASR_WINDOW_SEC, n_channels=None):
+    """
+    Calibration of a subject/session, computed once and cached in memory
+    and (when cache_dir is set) on disk. The cache key also holds the
+    channel count, sfreq, cutoff and window, so a different montage or
+    configuration gets its own calibration. data is only needed the first
+    time; without it, pass sfreq and n_channels to find a cached one.
+    """
+    if data is not None:
+        n_channels = data.shape[0]
+    if n_channels is None or sfreq is None:
+        raise ValueError("❌ ASR calibration lookup needs data, or sfreq and n_channels")
+    key = f"{session}-{n_channels}ch-{float(sfreq):g}Hz-c{cutoff:g}-w{window_sec:g}"
+    if key in _calibrations:
+        return _calibrations[key]
+
+    calibration = None
+    path = os.path.join(cache_dir, f"{key}.npz") if cache_dir else None
+    if path and os.path.exists(path):
+        with np.load(path) as f:
+            calibration = {"M": f["M"], "T": f["T"]}
+        if calibration["M"].shape != (n_channels, n_channels):
+            calibration = None  # stale or foreign file: recompute
+    if calibration is None:
+        if data is None:
+            raise ValueError(f"❌ No ASR calibration for '{key}' and no data to compute it")
+        calibration = calibrate(data, sfreq, cutoff, window_sec)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.savez(path, **calibration)
+
+    _calibrations[key] = calibration
+    return calibration
+
+
+def _reconstruct(windows, calibration, max_dims):
+    """
+    Cleaned copies of a batch of windows. One batched eigendecomposition
+    finds, per window, the components above threshold; those are rebuilt
+    from the rest through the calibration mixing matrix.
+    """
+    mixing, threshold = calibration["M"], calibration["T"]
+    n_channels = windows.shape[1]
+
+    evals, evecs = np.linalg.eigh(_covariances(windows))  # ascending
+    limit = np.sum((threshold @ evecs) ** 2, axis=1)
+    keep = (evals < limit) | (np.arange(n_channels) < n_channels - int(max_dims * n_channels))
+
+    recon = mixing @ np.linalg.pinv(keep[:, :, None] * (evecs.transpose(0, 2, 1) @ mixing)) \
+        @ evecs.transpose(0, 2, 1)
+    recon[keep.all(axis=1)] = np.eye(n_channels)
+    return recon @ windows
+
+
+def clean(data, sfreq, calibration, window_sec=ASR_WINDOW_SEC, max_dims=0.66, batch=256):
+    """
+    ASR-clean (channels x samples) data. Windows overlap by 50% and are
+    recombined with a Hann cross-fade; samples after the last full window
+    are passed through unchanged.
+    """
+    size, hop = _window_layout(sfreq, window_sec)
+    dtype = data.dtype if data.dtype in (np.float32, np.float64) else np.float64
+    out = np.array(data, dtype=dtype)
+    if data.shape[-1] < size:
+        return out
+
+    windows = _windows(data, size, hop)
+    n_windows = len(windows)
+    fade = hann(size, sym=False)
+    out[:, :(n_windows + 1) * hop] = 0
+
+    for start in range(0, n_windows, batch):
+        stop = min(start + batch, n_windows)
+        cleaned = _reconstruct(np.asarray(windows[start:stop], dtype=np.float64),
+                               calibration, max_dims)
+        if start == 0:
+            head = cleaned[0, :, :hop].copy()
+        if stop == n_windows:
+            tail = cleaned[-1, :, hop:].copy()
+
+        cleaned *= fade
+        n = stop - start
+        halves = cleaned.reshape(n, -1, 2, hop)  # (windows, channels, half, hop)
+        out[:, start * hop:stop * hop] += halves[:, :, 0].transpose(1, 0, 2).reshape(-1, n * hop)
+        out[:, (start + 1) * hop:(stop + 1) * hop] += halves[:, :, 1].transpose(1, 0, 2).reshape(-1, n * hop)
+
+    # the outer half-windows have no overlapping partner to fade into
+    out[:, :hop] = head
+    out[:, n_windows * hop:(n_windows + 1) * hop] = tail
+    return out
+
+
+class ASRStream:
+    """
+    Streaming ASR with the same windows and cross-fade as clean().
+    Output lags the input by one window; a block may return no samples.
+    """
+
+    def __init__(self, calibration, n_channels, sfreq, window_sec=ASR_WINDOW_SEC, max_dims=0.66):
+        self.calibration = calibration
+        self.size, self.hop = _window_layout(sfreq, window_sec)
+        self.fade = hann(self.size, sym=False)
+        self.max_dims = max_dims
+        self.pending = np.zeros((n_channels, 0))
+        self.carry = None  # faded second half of the previous window
+
+    def process(self, block):
+        self.pending = np.concatenate([self.pending, np.asarray(block, dtype=np.float64)], axis=1)
+        if self.pending.shape[1] < self.size:
+            return np.zeros((self.pending.shape[0], 0), dtype=block.dtype)
+
+        windows = _windows(self.pending, self.size, self.hop)
+        cleaned = _reconstruct(np.ascontiguousarray(windows), self.calibration, self.max_dims)
+
+        out = []
+        for window in cleaned:
+            if self.carry is None:
+                out.append(window[:, :self.hop])
+            else:
+                out.append(self.carry + window[:, :self.hop] * self.fade[:self.hop])
+            self.carry = window[:, self.hop:] * self.fade[self.hop:]
+
+        self.pending = self.pending[:, len(cleaned) * self.hop:]
+        return np.concatenate(out, axis=1).astype(block.dtype, copy=False)
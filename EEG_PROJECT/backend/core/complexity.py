@@ -0,0 +1,224 @@
+# backend/core/complexity.py
+#
+# Nonlinear complexity measures of every channel (and epoch). Every
+# function takes (..., samples) data and returns one value per series,
+# i.e. (channels,) or (epochs, channels). None of them compares all
+# pairs of samples one by one, so the cost grows sub-quadratically with
+# length; run this module to measure it:  python -m core.complexity
+
+from math import factorial
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.spatial import cKDTree
+
+MEASURES = ("sample_entropy", "permutation_entropy", "higuchi_fd", "lempel_ziv")
+
+
+def _rows(data):
+    data = np.asarray(data, dtype=np.float64)
+    return data.reshape(-1, data.shape[-1]), data.shape[:-1]
+
+
+def sample_entropy(data, m=2, r=0.2):
+    """
+    Sample entropy -log(A / B), B and A being the numbers of pairs of
+    length m and m + 1 templates within r x the series' std (Chebyshev
+    distance). Pairs are counted with a KD-tree instead of compared one
+    by one. NaN when no length m + 1 templates match.
+    """
+    rows, shape = _rows(data)
+    out = np.full(len(rows), np.nan)
+    n = rows.shape[-1] - m  # same number of templates for both lengths
+    if n < 2:
+        return out.reshape(shape)
+
+    for k, x in enumerate(rows):
+        radius = r * x.std()
+        counts = []
+        for length in (m, m + 1):
+            tree = cKDTree(sliding_window_view(x, length)[:n])
+            counts.append(tree.count_neighbors(tree, radius, p=np.inf) - n)  # drop self-matches
+        if counts[0] > 0 and counts[1] > 0:
+            out[k] = -np.log(counts[1] / counts[0])
+    return out.reshape(shape)
+
+
+def permutation_entropy(data, order=3, delay=1, normalize=True):
+    """
+    Shannon entropy (bits) of the ordinal patterns of order samples spaced
+    delay apart; divided by log2(order!) when normalize is set
+    """
+    rows, shape = _rows(data)
+    span = (order - 1) * delay + 1
+    if rows.shape[-1] < span:
+        return np.full(shape, np.nan)
+
+    windows = sliding_window_view(rows, span, axis=-1)[..., ::delay]
+    codes = np.argsort(windows, axis=-1, kind="stable") @ order ** np.arange(order)
+    n_codes = order ** order
+    codes += np.arange(len(rows))[:, None] * n_codes  # one bincount for all series
+    counts = np.bincount(codes.ravel(), minlength=len(rows) * n_codes).reshape(len(rows), n_codes)
+
+    p = counts / codes.shape[-1]
+    entropy = -np.sum(p * np.log2(np.where(p > 0, p, 1)), axis=-1)
+    if normalize:
+        entropy /= np.log2(factorial(order))
+    return entropy.reshape(shape)
+
+
+def higuchi_fd(data, kmax=10):
+    """
+    Higuchi fractal dimension: slope of log curve length L(k) against
+    log(1/k) for k = 1..kmax. All series are processed together.
+    """
+    rows, shape = _rows(data)
+    n = rows.shape[-1]
+    ks = np.arange(1, min(kmax, (n - 1) // 2) + 1)
+    if len(ks) < 2:
+        return np.full(shape, np.nan)
+
+    lengths = np.empty((len(ks), len(rows)))
+    for i, k in enumerate(ks):
+        curve = np.zeros(len(rows))
+        for start in range(k):
+            steps = (n - start - 1) // k
+            diffs = np.abs(np.diff(rows[:, start::k][:, :steps + 1], axis=-1)).sum(axis=-1)
+            curve += diffs * (n - 1) / (steps * k) / k
+        lengths[i] = curve / k
+
+    slope = np.polyfit(np.log(1.0 / ks), np.log(lengths + 1e-300), 1)[0]
+    return slope.reshape(shape)
+
+
+def _suffix_ranks(s):
+    # Prefix doubling (n >= 2): ranks[j][p] orders the substrings
+    # s[p:p + 2**j] (cut at the end of s), equal ranks <=> equal substrings;
+    # also returns the suffix array
+    n = len(s)
+    rank = np.unique(s, return_inverse=True)[1].astype(np.int64)
+    ranks = [rank]
+    k = 1
+    while k < n:
+        second = np.full(n, -1, dtype=np.int64)
+        second[:n - k] = rank[k:]
+        order = np.lexsort((second, rank))
+        key_changed = np.diff(rank[order]) != 0
+        key_changed |= np.diff(second[order]) != 0
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.concatenate([[0], np.cumsum(key_changed)])
+        ranks.append(rank)
+        if rank[order[-1]] == n - 1:
+            break  # all suffixes distinct
+        k *= 2
+    return ranks, order
+
+
+def _common_prefix(ranks, i, j):
+    # Longest common prefix of suffixes i and j (arrays), by binary
+    # lifting over the doubling ranks: O(log n) vector steps
+    n = len(ranks[0])
+    lcp = np.zeros(len(i), dtype=np.int64)
+    i, j = i.copy(), j.copy()
+    for level in range(len(ranks) - 1, -1, -1):
+        step = 1 << level
+        ok = (i + step <= n) & (j + step <= n)
+        ok[ok] = ranks[level][i[ok]] == ranks[level][j[ok]]
+        i[ok] += step
+        j[ok] += step
+        lcp[ok] += step
+    return lcp
+
+
+def _lz76_count(s):
+    """
+    Number of phrases of the LZ76 parsing of s. The phrase starting at i
+    is one symbol longer than the longest prefix of s[i:] that starts
+    earlier in s; that length comes from the suffix array (neighbours in
+    sorted order with a smaller start), so the cost is O(n log n).
+    """
+    n = len(s)
+    if n < 2:
+        return n
+    ranks, order = _suffix_ranks(s)
+
+    # nearest suffix before / after each one in sorted order that starts earlier
+    prev = np.full(n, -1, dtype=np.int64)
+    nxt = np.full(n, -1, dtype=np.int64)
+    stack = []
+    for p in order.tolist():
+        while stack and stack[-1] > p:
+            nxt[stack.pop()] = p
+        prev[p] = stack[-1] if stack else -1
+        stack.append(p)
+
+    idx = np.arange(n)
+    longest = np.zeros(n, dtype=np.int64)
+    for other in (prev, nxt):
+        has = other >= 0
+        longest[has] = np.maximum(longest[has], _common_prefix(ranks, idx[has], other[has]))
+
+    count, i = 0, 0
+    while i < n:
+        count += 1
+        i += longest[i] + 1
+    return count
+
+
+def lempel_ziv(data, normalize=True):
+    """
+    Lempel-Ziv (LZ76) complexity of each series binarized at its median;
+    normalized by n / log2(n) when normalize is set
+    """
+    rows, shape = _rows(data)
+    n = rows.shape[-1]
+    binary = rows > np.median(rows, axis=-1, keepdims=True)
+    counts = np.array([_lz76_count(b) for b in binary], dtype=np.float64)
+    if normalize and n > 1:
+        counts *= np.log2(n) / n
+    return counts.reshape(shape)
+
+
+_FUNCTIONS = {
+    "sample_entropy": sample_entropy,
+    "permutation_entropy": permutation_entropy,
+    "higuchi_fd": higuchi_fd,
+    "lempel_ziv": lempel_ziv,
+}
+
+
+def extract_complexity_features(preprocessed_data, measures=MEASURES):
+    """
+    preprocessed_data: tuple (data, sfreq); data is (channels x samples) or
+        an (epochs x channels x samples) stack from make_epochs()
+    Returns (..., channels, measures), columns in the order of measures
+    """
+    data, _ = preprocessed_data
+    unknown = set(measures) - set(_FUNCTIONS)
+    if unknown:
+        raise ValueError(f"❌ Invalid complexity measure(s): {sorted(unknown)}")
+    return np.stack([_FUNCTIONS[name](data) for name in measures], axis=-1)
+
+
+if __name__ == "__main__":
+    # Scaling benchmark: time per 4-channel batch at doubling lengths. The
+    # fitted exponent b of time ~ n**b stays below 2.
+    import time
+
+    from scipy.signal import lfilter
+
+    rng = np.random.default_rng(0)
+    lengths = [2048, 4096, 8192, 16384, 32768]
+    # stationary AR(1) noise, closer to band-passed EEG than a random walk
+    signals = {n: lfilter([1.0], [1.0, -0.95], rng.standard_normal((4, n))) for n in lengths}
+
+    for name, function in _FUNCTIONS.items():
+        function(signals[lengths[0]])  # warm up
+        times = []
+        for n in lengths:
+            start = time.perf_counter()
+            function(signals[n])
+            times.append(time.perf_counter() - start)
+        exponent = np.polyfit(np.log(lengths), np.log(times), 1)[0]
+        cells = "  ".join(f"{n}: {t * 1e3:7.1f} ms" for n, t in zip(lengths, times))
+        print(f"{name:20s} {cells}  -> O(n^{exponent:.2f})")
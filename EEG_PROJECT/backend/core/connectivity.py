@@ -0,0 +1,119 @@
+# backend/core/connectivity.py
+#
+# Inter-channel connectivity per band, for all channel pairs at once.
+# Everything is derived from the segment spectrum of compute_spectrum(),
+# the same FFT that the band powers come from.
+
+import numpy as np
+
+from core.feature_extraction import BANDS, band_weights, compute_spectrum, spectrum_psd, \
+    channel_band_powers
+
+MEASURES = ("coherence", "plv", "wpli")
+
+
+def channel_pairs(n_channels):
+    """
+    (rows, cols) of the n*(n-1)/2 channel pairs i < j, in the order used
+    along the pairs axis of every connectivity result
+    """
+    return np.triu_indices(n_channels, k=1)
+
+
+def to_matrix(values, n_channels, diagonal=1.0):
+    """
+    Symmetric (..., bands, channels, channels) matrices from
+    (..., pairs, bands) connectivity values
+    """
+    rows, cols = channel_pairs(n_channels)
+    values = np.moveaxis(values, -1, -2)  # (..., bands, pairs)
+    matrix = np.full(values.shape[:-1] + (n_channels, n_channels), diagonal, dtype=values.dtype)
+    matrix[..., rows, cols] = values
+    matrix[..., cols, rows] = values
+    return matrix
+
+
+def _cross(a, b):
+    # mean over segments of a_i * conj(b_j) for every channel pair, as one
+    # batched matmul per frequency: (..., freqs, channels, channels)
+    a = np.moveaxis(a, -1, -3)  # (..., freqs, channels, segments)
+    b = np.moveaxis(b, -1, -3)
+    return a @ b.conj().swapaxes(-1, -2) / a.shape[-1]
+
+
+def _wpli_denominator(spectrum, rows, cols, batch):
+    # mean over segments of |Im(X_i conj(X_j))|; the absolute value does
+    # not factor, so pairs are gathered explicitly, batch at a time
+    out = np.empty(spectrum.shape[:-3] + (len(rows), spectrum.shape[-1]), dtype=spectrum.real.dtype)
+    re, im = spectrum.real, spectrum.imag
+    for start in range(0, len(rows), batch):
+        i, j = rows[start:start + batch], cols[start:start + batch]
+        imag = im[..., i, :, :] * re[..., j, :, :] - re[..., i, :, :] * im[..., j, :, :]
+        out[..., start:start + batch, :] = np.abs(imag).mean(axis=-2)
+    return out
+
+
+def spectral_connectivity(freqs, spectrum, bands=BANDS, measures=MEASURES, batch=512):
+    """
+    Connectivity of every channel pair from compute_spectrum() output
+    (..., channels, segments, freqs). Returns a dict of measure ->
+    (..., pairs, bands), pairs ordered as in channel_pairs():
+
+    coherence: magnitude-squared coherence |Sxy|^2 / (Sxx Syy)
+    plv:       phase-locking value |mean(exp(i * phase difference))|
+    wpli:      weighted phase-lag index |mean(Im Sxy)| / mean(|Im Sxy|)
+
+    Averages run over the segments, so they need several of them: use a
+    short nperseg for short epochs. Per-frequency values are averaged over
+    the bins of each band like the band powers.
+    """
+    unknown = set(measures) - set(MEASURES)
+    if unknown:
+        raise ValueError(f"❌ Invalid connectivity measure(s): {sorted(unknown)}")
+
+    weights = band_weights(freqs, bands)
+    used = np.nan_to_num(weights).any(axis=0)  # only bins inside some band
+    weights = weights[:, used].T.astype(spectrum.real.dtype)  # (freqs, bands)
+    spectrum = spectrum[..., used]
+
+    rows, cols = channel_pairs(spectrum.shape[-3])
+    tiny = np.finfo(spectrum.real.dtype).tiny
+    results = {}
+
+    if "coherence" in measures or "wpli" in measures:
+        cross = _cross(spectrum, spectrum)  # (..., freqs, channels, channels)
+        pairs = np.moveaxis(cross[..., rows, cols], -2, -1)  # (..., pairs, freqs)
+
+    if "coherence" in measures:
+        power = np.moveaxis(np.diagonal(cross, axis1=-2, axis2=-1).real, -2, -1)  # (..., channels, freqs)
+        coherence = np.abs(pairs) ** 2 / (power[..., rows, :] * power[..., cols, :] + tiny)
+        results["coherence"] = coherence @ weights
+
+    if "plv" in measures:
+        phase = spectrum / (np.abs(spectrum) + tiny)
+        locking = _cross(phase, phase)[..., rows, cols]
+        results["plv"] = np.moveaxis(np.abs(locking), -2, -1) @ weights
+
+    if "wpli" in measures:
+        denominator = _wpli_denominator(spectrum, rows, cols, batch)
+        results["wpli"] = (np.abs(pairs.imag) / (denominator + tiny)) @ weights
+
+    return results
+
+
+def extract_connectivity(preprocessed_data, bands=BANDS, measures=MEASURES, nperseg=None,
+                         with_powers=False):
+    """
+    preprocessed_data: tuple (data, sfreq); data is (channels x samples) or
+        an (epochs x channels x samples) stack from make_epochs()
+    nperseg: segment length of the shared FFT (see compute_spectrum);
+        defaults to one second, so a 2 s epoch still has 3 segments
+    with_powers: also return the (..., channels, bands) band powers,
+        computed from the same FFT, under "band_powers"
+    """
+    data, sf = preprocessed_data
+    freqs, spectrum = compute_spectrum(data, sf, nperseg or int(round(sf)))
+    results = spectral_connectivity(freqs, spectrum, bands, measures)
+    if with_powers:
+        results["band_powers"] = channel_band_powers(*spectrum_psd(freqs, spectrum), bands)
+    return results
@@ -0,0 +1,51 @@
+# backend/core/epoching.py
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def epoch_layout(sfreq, epoch_sec=2.0, overlap=0.5):
+    """
+    (epoch length, step) in samples. overlap is the fraction of an epoch
+    shared with the next one, 0 <= overlap < 1.
+    """
+    if not 0 <= overlap < 1:
+        raise ValueError("❌ overlap must be in [0, 1)")
+    size = int(round(epoch_sec * sfreq))
+    if size <= 0:
+        raise ValueError("❌ epoch_sec is too short for this sampling frequency")
+    step = max(1, int(round(size * (1 - overlap))))
+    return size, step
+
+
+def make_epochs(data, sfreq, epoch_sec=2.0, overlap=0.5):
+    """
+    Split (channels x samples) data into an (epochs x channels x samples)
+    strided view. Nothing is copied, so the view is read-only; samples
+    after the last full epoch are dropped.
+    """
+    size, step = epoch_layout(sfreq, epoch_sec, overlap)
+    if size > data.shape[-1]:
+        return np.empty((0, data.shape[0], size), dtype=data.dtype)
+    windows = sliding_window_view(data, size, axis=-1)  # (channels, positions, size)
+    return windows[:, ::step].transpose(1, 0, 2)
+
+
+def epoch_times(n_epochs, sfreq, epoch_sec=2.0, overlap=0.5):
+    """
+    Start time (s) of every epoch produced by make_epochs()
+    """
+    size, step = epoch_layout(sfreq, epoch_sec, overlap)
+    return np.arange(n_epochs) * step / sfreq
+
+
+def keep_epochs(results, reject=None):
+    """
+    Rows of per-epoch results (features from extract_features(), epoch
+    times, ...) whose epoch is not flagged in the boolean reject mask (all
+    when reject is None). Apply it after feature extraction: indexing the
+    strided epoch view itself would copy every kept, overlapping epoch.
+    """
+    if reject is None:
+        return results
+    return results[np.flatnonzero(~np.asarray(reject, dtype=bool))]
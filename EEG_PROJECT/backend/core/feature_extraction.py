@@ -1,29 +1,266 @@
 # backend/core/feature_extraction.py
 
+from functools import lru_cache
+
 import numpy as np
-from scipy.signal import welch
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import fft
+from scipy.signal import get_window
+from scipy.signal.windows import dpss
+
+# Frequency bands used by the model, in feature-column order
+BANDS = {
+    "delta": (0.5, 4),
+    "theta": (4, 8),
+    "alpha": (8, 13),
+    "beta": (13, 30),
+    "gamma": (30, 40),
+}
+
+# Default Welch segment length (samples); streaming estimators that must
+# reproduce extract_features() pass their own layout explicitly
+WELCH_NPERSEG = 1024
+
+# Band-power ratios reported alongside the absolute/relative powers
+RATIOS = {
+    "theta_alpha": ("theta", "alpha"),
+    "theta_beta": ("theta", "beta"),
+    "alpha_beta": ("alpha", "beta"),
+    "delta_alpha": ("delta", "alpha"),
+}
+
+# Default electrode groups (10-20 system) for regional pooling
+REGIONS = {
+    "frontal": ["Fp1", "Fp2", "F3", "F4", "F7", "F8", "Fz"],
+    "central": ["C3", "C4", "Cz"],
+    "temporal": ["T3", "T4", "T5", "T6", "T7", "T8"],
+    "parietal": ["P3", "P4", "P7", "P8", "Pz"],
+    "occipital": ["O1", "O2", "Oz"],
+}
+
+
+def compute_psd(data, sf, method="welch", nw=4.0, nperseg=None, noverlap=None):
+    """
+    PSD of every channel (and epoch), computed once per recording.
+    method: "welch" or "multitaper" (lower variance on short epochs)
+    nperseg, noverlap: Welch segment layout (see compute_spectrum)
+    """
+    if method == "multitaper":
+        return multitaper_psd(data, sf, nw)
+    elif method != "welch":
+        raise ValueError(f"❌ Invalid PSD method: {method}")
+    return spectrum_psd(*compute_spectrum(data, sf, nperseg, noverlap))
+
+
+def compute_spectrum(data, sf, nperseg=None, noverlap=None):
+    """
+    Hann-windowed FFT of the overlapping Welch segments of every channel
+    (and epoch) -> (freqs, (..., channels, segments, freqs)).
+    Scaled so that spectrum_psd() matches welch(); the one FFT behind
+    both band powers and connectivity (see core.connectivity).
+    nperseg: segment length, default min(WELCH_NPERSEG, samples)
+    noverlap: samples shared by consecutive segments, default nperseg // 2
+    """
+    n = data.shape[-1]
+    nperseg = min(nperseg or WELCH_NPERSEG, n)
+    hop = nperseg - (nperseg // 2 if noverlap is None else min(noverlap, nperseg - 1))
+    dtype = np.float32 if data.dtype == np.float32 else np.float64
+    taper = get_window("hann", nperseg).astype(dtype)
+
+    segments = sliding_window_view(np.asarray(data, dtype=dtype), nperseg, axis=-1)[..., ::hop, :]
+    segments = segments - segments.mean(axis=-1, keepdims=True)  # detrend="constant"
+    spectrum = fft.rfft(segments * taper, axis=-1)
+
+    # one-sided density scaling, folded into the amplitudes
+    scale = np.full(spectrum.shape[-1], 2.0)
+    scale[0] = 1.0
+    if nperseg % 2 == 0:
+        scale[-1] = 1.0  # Nyquist bin is not mirrored
+    spectrum *= np.sqrt(scale / (sf * np.sum(taper.astype(np.float64) ** 2))).astype(dtype)
+    return fft.rfftfreq(nperseg, 1.0 / sf), spectrum
+
+
+def spectrum_psd(freqs, spectrum):
+    """
+    (freqs, PSD) from compute_spectrum(): the mean periodogram over segments
+    """
+    return freqs, np.mean(spectrum.real ** 2 + spectrum.imag ** 2, axis=-2)
+
+
+@lru_cache(maxsize=16)
+def dpss_tapers(n_samples, nw=4.0):
+    """
+    The 2*NW - 1 DPSS tapers for one window length, designed once
+    """
+    tapers = dpss(n_samples, nw, Kmax=max(1, int(2 * nw) - 1))
+    tapers.flags.writeable = False  # shared between callers via the cache
+    return tapers
+
+
+def multitaper_psd(data, sf, nw=4.0):
+    """
+    Multitaper PSD over the last axis: every taper of every channel and
+    epoch goes through a single batched real FFT. Same one-sided density
+    scaling as welch().
+    """
+    n = data.shape[-1]
+    tapers = dpss_tapers(n, float(nw)).astype(data.dtype if data.dtype == np.float32 else np.float64)
+    centered = data - data.mean(axis=-1, keepdims=True)
+    spectrum = fft.rfft(centered[..., None, :] * tapers, axis=-1)  # (..., tapers, freqs)
+    psd = np.mean(spectrum.real ** 2 + spectrum.imag ** 2, axis=-2) / sf
+    psd[..., 1:] *= 2
+    if n % 2 == 0:
+        psd[..., -1] /= 2  # Nyquist bin is not mirrored
+    return fft.rfftfreq(n, 1.0 / sf), psd
+
+
+@lru_cache(maxsize=32)
+def _band_weights(n_freqs, df, bands):
+    freqs = np.arange(n_freqs) * df
+    weights = np.zeros((len(bands), n_freqs))
+    for i, (low, high) in enumerate(bands):
+        idx = (freqs >= low) & (freqs <= high)
+        weights[i, idx] = 1.0 / idx.sum() if idx.any() else np.nan
+    weights.flags.writeable = False  # shared between callers via the cache
+    return weights
+
+
+def band_weights(freqs, bands=BANDS):
+    """
+    (bands x freqs) matrix whose rows average the PSD bins of one band.
+    Cached per PSD layout so the bin masks are built only once.
+    """
+    df = float(freqs[1] - freqs[0]) if len(freqs) > 1 else 0.0
+    return _band_weights(len(freqs), df, tuple(bands.values()))
+
+
+def channel_band_powers(freqs, psd, bands=BANDS):
+    """
+    Mean PSD of every band for every channel -> (..., channels, bands)
+    """
+    return psd @ band_weights(freqs, bands).T.astype(psd.dtype, copy=False)
+
+
+def band_powers(freqs, psd, bands=BANDS):
+    """
+    Mean PSD of every band, pooled over all channels -> (bands,)
+    """
+    return channel_band_powers(freqs, psd, bands).mean(axis=-2)
+
+
+def band_integrals(freqs, psd, bands=BANDS):
+    """
+    Power in every band (PSD summed over its bins x bin width), pooled
+    over all channels -> (bands,)
+    """
+    df = float(freqs[1] - freqs[0]) if len(freqs) > 1 else 0.0
+    n_bins = np.count_nonzero(band_weights(freqs, bands) > 0, axis=1)
+    return band_powers(freqs, psd, bands) * n_bins * df
+
+
+def region_pooling(regions, n_channels, ch_names=None, channel_mask=None):
+    """
+    (regions x channels) averaging matrix. Region members may be channel
+    indices or, when ch_names is given, channel names. Names that are not
+    in the recording and channels with channel_mask False are ignored; a
+    region with no members pools to NaN. Name-based regions without
+    ch_names raise, since none of their members could be found.
+    """
+    named = any(not isinstance(m, (int, np.integer)) for members in regions.values() for m in members)
+    if named and not ch_names:
+        raise ValueError("❌ Regions given by channel name need ch_names "
+                         "(see load_data(..., return_names=True))")
+    lookup = {name.lower(): i for i, name in enumerate(ch_names or [])}
+    good = np.ones(n_channels, dtype=bool) if channel_mask is None \
+        else np.asarray(channel_mask, dtype=bool)
+    pool = np.zeros((len(regions), n_channels))
+    for r, members in enumerate(regions.values()):
+        idx = [m if isinstance(m, (int, np.integer)) else lookup.get(str(m).lower())
+               for m in members]
+        idx = sorted({i for i in idx if i is not None and 0 <= i < n_channels and good[i]})
+        if idx:
+            pool[r, idx] = 1.0 / len(idx)
+        else:
+            pool[r, :] = np.nan
+    return pool
 
-# backend/core/feature_extraction.py
 
 def bandpower(data, sf, band):
-    low, high = band
-    nperseg = min(1024, data.shape[1])  # prevent warning on short signals
-    freqs, psd = welch(data, sf, nperseg=nperseg)
-    idx = (freqs >= low) & (freqs <= high)
-    return np.mean(psd[:, idx])
+    freqs, psd = compute_psd(data, sf)
+    return band_powers(freqs, psd, {"band": band})[0]
+
+
+def extract_spectral_features(preprocessed_data, bands=BANDS, ratios=RATIOS, psd_method="welch"):
+    """
+    Absolute, relative and ratio band powers from a single PSD pass.
+    Returns a dict of name -> value.
+    """
+    data, sf = preprocessed_data
+    freqs, psd = compute_psd(data, sf, psd_method)
+    absolute = band_powers(freqs, psd, bands)
+    # share of the total power between the lowest and highest band edge;
+    # adjacent bands share their edge bin, so shares can sum to just over 1
+    edges = [edge for band in bands.values() for edge in band]
+    total = band_integrals(freqs, psd, {"total": (min(edges), max(edges))})[0]
+    relative = band_integrals(freqs, psd, bands) / total
 
+    names = list(bands)
+    features = {}
+    for i, name in enumerate(names):
+        features[name] = absolute[i]
+        features[f"{name}_rel"] = relative[i]
+    for ratio, (num, den) in ratios.items():
+        features[ratio] = absolute[names.index(num)] / absolute[names.index(den)]
+    return features
 
-def extract_features(preprocessed_data):
+
+def extract_features(preprocessed_data, mode="mean", regions=None, ch_names=None,
+                     channel_mask=None, psd_method="welch", nperseg=None, noverlap=None):
     """
-    preprocessed_data: tuple (data, sfreq)
+    preprocessed_data: tuple (data, sfreq); data is (channels x samples)
+        or an (epochs x channels x samples) stack from make_epochs(), in
+        which case every result gets a leading epochs axis
+    mode: "mean"    -> (1, bands) grand mean over channels
+          "channel" -> (channels, bands)
+          "region"  -> (regions, bands), pooled with `regions`
+                       (defaults to REGIONS, matched against ch_names,
+                       which is then required)
+    channel_mask: boolean (channels,) with False for bad channels (see
+        core.quality); they are left out of every pooled value and come
+        out as NaN in "channel" mode
+    psd_method: "welch" or "multitaper" (see compute_psd)
+    nperseg, noverlap: Welch segment layout (see compute_spectrum)
     """
     data, sf = preprocessed_data  # unpack tuple
 
-    delta = bandpower(data, sf, (0.5, 4))
-    theta = bandpower(data, sf, (4, 8))
-    alpha = bandpower(data, sf, (8, 13))
-    beta  = bandpower(data, sf, (13, 30))
-    gamma = bandpower(data, sf, (30, 40))
+    freqs, psd = compute_psd(data, sf, psd_method, nperseg=nperseg, noverlap=noverlap)
+    channel_powers = channel_band_powers(freqs, psd)
+    if channel_mask is not None:
+        good = np.asarray(channel_mask, dtype=bool)
+        channel_powers = np.where(good[:, None], channel_powers, np.nan)
+
+    if mode == "mean":
+        features = channel_powers.mean(axis=-2) if channel_mask is None \
+            else np.nanmean(channel_powers, axis=-2)
+        return features.reshape(1, -1) if data.ndim == 2 else features
+    elif mode == "channel":
+        return channel_powers
+    elif mode == "region":
+        pool = region_pooling(regions or REGIONS, data.shape[-2], ch_names, channel_mask)
+        return pool.astype(channel_powers.dtype) @ np.nan_to_num(channel_powers)
+    else:
+        raise ValueError(f"❌ Invalid feature mode: {mode}")
 
-    features = np.array([delta, theta, alpha, beta, gamma])
-    return features.reshape(1, -1)
\ No newline at end of file
+
+def to_model_input(features, batched=False):
+    """
+    Flatten features into the (rows x n_features) layout expected by the
+    model. batched=False: the whole array, e.g. (channels x bands) or mean
+    (1, bands), is one row. batched=True: the first axis runs over epochs
+    or recordings, e.g. (epochs, bands) or (epochs, channels, bands), and
+    each entry becomes one row.
+    """
+    features = np.asarray(features)
+    if batched:
+        return features.reshape(features.shape[0], -1)
+    return features.reshape(1, -1)
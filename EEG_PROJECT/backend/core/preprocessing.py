@@ -1,11 +1,201 @@
+from fractions import Fraction
+from functools import lru_cache
+
 import pandas as pd
 import numpy as np
+from scipy.signal import butter, iirnotch, resample_poly, sosfilt, sosfiltfilt, tf2sos
+
+from config import (CACHE_ENABLED, CANONICAL_SFREQ, DTYPE, LOW_CUTOFF, HIGH_CUTOFF, POWERLINE_FREQ,
+                    FILTER_ORDER, NOTCH_Q, NOTCH_HARMONICS)
+from utils import recording_cache
+from utils.helpers import file_hash
+
+DEFAULT_SFREQ = 256  # sampling frequency assumed when a file has no usable time column
+SFREQ_RANGE = (32, 16384)  # plausible EEG sampling frequencies (Hz)
+CHUNK_ROWS = 100_000  # rows per chunk for streaming CSV ingestion
+PARSER_VERSION = 5  # part of the cache key; bump when parsing output changes
+
+
+def _count_rows(file_path):
+    """
+    Count data rows (excluding the header) without parsing the file
+    """
+    rows = 0
+    last = b"\n"
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            rows += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        rows += 1  # no trailing newline
+    return rows - 1
+
+
+def _time_column(columns):
+    for column in columns:
+        name = str(column).strip().lower()
+        if name in ("t", "timestamp", "seconds") or name.startswith("time"):
+            return column
+    return None
+
+
+def channel_layout(df):
+    """
+    EEG channel columns and sampling frequency of a (partial) recording.
+    A numeric time column, if present, is not a channel: the sampling
+    frequency is read from its median step, taken in whichever of s, ms,
+    us or ns puts it in SFREQ_RANGE (e.g. epoch-millisecond timestamps).
+    Falls back to DEFAULT_SFREQ, with a warning, when none does.
+    """
+    columns = list(df.select_dtypes(include=[np.number]).columns)
+    time_column = _time_column(columns)
+    if time_column is None:
+        return columns, DEFAULT_SFREQ
+
+    columns.remove(time_column)
+    step = np.median(np.diff(df[time_column].to_numpy(dtype=np.float64)))
+    if np.isfinite(step) and step > 0:
+        low, high = SFREQ_RANGE
+        for unit in (1.0, 1e-3, 1e-6, 1e-9):  # the range spans < 1000x, so at most one fits
+            sfreq = 1.0 / (step * unit)
+            if low <= sfreq <= high:
+                return columns, round(sfreq) if abs(sfreq - round(sfreq)) < 1e-3 * sfreq else sfreq
+    print(f"⚠️ Time column '{time_column}' gives no plausible sampling frequency "
+          f"(median step {step}); assuming {DEFAULT_SFREQ} Hz")
+    return columns, DEFAULT_SFREQ
+
+
+def resample_factors(sfreq, target):
+    """
+    (up, down) of the polyphase resampling from sfreq to target Hz
+    """
+    ratio = Fraction(float(target) / float(sfreq)).limit_denominator(1000)
+    return ratio.numerator, ratio.denominator
+
+
+def resample_data(data, sfreq, target=CANONICAL_SFREQ):
+    """
+    Polyphase-resample all channels to `target` Hz in one call.
+    Returns (data, target); data is returned as-is if already at target.
+    """
+    if target is None or sfreq == target:
+        return data, sfreq
+    up, down = resample_factors(sfreq, target)
+    data = resample_poly(data, up, down, axis=-1)
+    print(f"✅ Resampled {sfreq} Hz -> {target} Hz")
+    return data, target
+
+
+@lru_cache(maxsize=16)
+def design_filter_cascade(sfreq, low=LOW_CUTOFF, high=HIGH_CUTOFF, powerline=POWERLINE_FREQ,
+                          order=FILTER_ORDER, notch_q=NOTCH_Q, harmonics=NOTCH_HARMONICS):
+    """
+    Band-pass followed by powerline notches at the fundamental and its
+    harmonics, as one SOS cascade so the signal is filtered in one pass.
+    Harmonics at or above Nyquist are skipped.
+    """
+    sections = [butter(order, [low, high], btype="band", fs=sfreq, output="sos")]
+    for k in range(1, harmonics + 1):
+        freq = k * powerline
+        if freq >= sfreq / 2:
+            break
+        b, a = iirnotch(freq, notch_q, fs=sfreq)
+        sections.append(tf2sos(b, a))
+    return np.vstack(sections)
+
+
+def filter_data(data, sfreq, zero_phase=False):
+    """
+    Apply the configured band-pass + notch cascade to all channels,
+    keeping the dtype of float32/float64 input.
+    zero_phase runs the cascade forward and backward (no phase shift).
+    Streaming callers use design_filter_cascade() with a stateful filter.
+    """
+    dtype = data.dtype if data.dtype in (np.float32, np.float64) else np.float64
+    sos = design_filter_cascade(float(sfreq)).astype(dtype)
+    if zero_phase:
+        return sosfiltfilt(sos, data, axis=-1)
+    return sosfilt(sos, data, axis=-1)
+
+
+def read_csv_chunked(file_path, chunksize=CHUNK_ROWS, out_path=None, dtype=DTYPE):
+    """
+    Stream a CSV into a preallocated (channels x samples) array of dtype.
+    Only one chunk of rows is parsed at a time, so peak memory stays close
+    to the size of the signal itself. If out_path is given the signal is
+    written into an .npy memmap there instead of RAM.
+    """
+    columns, _ = channel_layout(pd.read_csv(file_path, nrows=1000))
+    n_rows = _count_rows(file_path)
+
+    shape = (len(columns), n_rows)
+    if out_path is not None:
+        data = np.lib.format.open_memmap(out_path, mode="w+", dtype=dtype, shape=shape)
+    else:
+        data = np.empty(shape, dtype=dtype)
 
-def preprocess_data(file_path):
+    start = 0
+    reader = pd.read_csv(file_path, usecols=columns, dtype=dtype, chunksize=chunksize)
+    for chunk in reader:
+        stop = start + len(chunk)
+        data[:, start:stop] = chunk[columns].to_numpy().T
+        start = stop
+
+    if start != n_rows:  # blank lines etc.
+        data = data[:, :start]
+    return data
+
+
+def preprocess_data(file_path, chunksize=None, out_path=None, use_cache=CACHE_ENABLED,
+                    target_sfreq=CANONICAL_SFREQ, apply_filter=True, zero_phase=False,
+                    return_names=False):
+    """
+    Reads CSV/XLSX and returns numeric EEG data (config.DTYPE) + sampling frequency.
+    chunksize: stream CSV files in chunks of this many rows
+    out_path: with chunksize, write the signal into an .npy memmap
+    use_cache: reuse the parsed matrix of a file with identical content
+    target_sfreq: resample to this rate first (None keeps the file's rate)
+    apply_filter: band-pass + powerline notch the data (see filter_data)
+    return_names: return (data, sfreq, ch_names), e.g. for region features
+    """
+    data, sfreq, ch_names = load_data(file_path, chunksize, out_path, use_cache, return_names=True)
+    data, sfreq = resample_data(data, sfreq, target_sfreq)
+    if apply_filter:
+        data = filter_data(data, sfreq, zero_phase)
+        print("✅ Band-pass + notch filters applied")
+    return (data, sfreq, ch_names) if return_names else (data, sfreq)
+
+
+def load_data(file_path, chunksize=None, out_path=None, use_cache=CACHE_ENABLED,
+              return_names=False):
     """
-    Reads CSV/XLSX and returns numeric EEG data + sampling frequency
+    Parsed (unfiltered) numeric EEG data + the file's sampling frequency
+    (+ the channel column names with return_names)
     """
     print(f"🔄 Loading dataset from: {file_path}")
+
+    key = f"{file_hash(file_path)}-v{PARSER_VERSION}-{DTYPE}" if use_cache else None
+    if key is not None:
+        cached = recording_cache.lookup(key)
+        if cached is not None:
+            print("⚡ Parsed recording loaded from cache")
+            print("Data shape (channels x samples):", cached[0].shape)
+            return cached if return_names else cached[:2]
+
+    data, sfreq, ch_names = _parse_file(file_path, chunksize, out_path)
+    if key is not None:
+        data, sfreq, ch_names = recording_cache.store(key, data, sfreq, ch_names)
+    return (data, sfreq, ch_names) if return_names else (data, sfreq)
+
+
+def _parse_file(file_path, chunksize=None, out_path=None):
+    if chunksize and file_path.endswith(".csv"):
+        data = read_csv_chunked(file_path, chunksize, out_path)
+        columns, sfreq = channel_layout(pd.read_csv(file_path, nrows=1000))
+        print("✅ Dataset streamed successfully")
+        print("Data shape (channels x samples):", data.shape)
+        return data, sfreq, [str(column) for column in columns]
+
     # Detect extension
     if file_path.endswith(".csv"):
         df = pd.read_csv(file_path)
@@ -15,12 +205,12 @@ def preprocess_data(file_path):
         raise ValueError("Unsupported file type")
 
     # Keep only numeric columns (EEG channels)
-    numeric_df = df.select_dtypes(include=[np.number])
+    columns, sfreq = channel_layout(df)
+    numeric_df = df[columns]
     print("✅ Dataset loaded successfully")
     print("First 5 rows:\n", numeric_df.head())
 
-    data = numeric_df.values.T  # channels x samples
-    print("Data shape (channels x samples):", data.shape)
+    data = numeric_df.to_numpy(dtype=DTYPE).T  # channels x samples
+    print("Data shape (channels x samples):", data.shape, "@", sfreq, "Hz")
 
-    sfreq = 256  # default sampling frequency
-    return data, sfreq
\ No newline at end of file
+    return data, sfreq, [str(column) for column in columns]
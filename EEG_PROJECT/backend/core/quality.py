@@ -0,0 +1,88 @@
+# backend/core/quality.py
+
+import numpy as np
+
+from config import POWERLINE_FREQ
+from core.feature_extraction import compute_psd
+
+
+def _robust_z(values, axis=-1):
+    median = np.median(values, axis=axis, keepdims=True)
+    mad = np.median(np.abs(values - median), axis=axis, keepdims=True)
+    return (values - median) / (1.4826 * mad + 1e-12)
+
+
+def detect_bad_channels(data, sfreq, flat_ratio=0.01, clip_frac=0.005, z_thresh=5.0,
+                        line_ratio=10.0, powerline=POWERLINE_FREQ):
+    """
+    Flag bad channels of (channels x samples) data. Returns a dict of
+    boolean (channels,) masks: "flat", "clipped", "noisy", "line_noise"
+    and their union "bad".
+
+    flat:       std below flat_ratio x the median channel std
+    clipped:    more than clip_frac of samples sit at the channel min/max
+    noisy:      log-std robust z-score above z_thresh
+    line_noise: ratio of the PSD peak within 1 Hz of the powerline
+                frequency to the median PSD 2-5 Hz away from it is a
+                robust outlier (log-ratio z-score above z_thresh) and
+                above line_ratio. Mains pickup shared by most channels
+                is left to the notch filter.
+    """
+    std = data.std(axis=-1)
+    lo = data.min(axis=-1, keepdims=True)
+    hi = data.max(axis=-1, keepdims=True)
+
+    masks = {}
+    masks["flat"] = std <= flat_ratio * np.median(std)
+    at_rail = (data == lo) | (data == hi)
+    masks["clipped"] = (at_rail.mean(axis=-1) > clip_frac) & ~masks["flat"]
+    masks["noisy"] = _robust_z(np.log(std + 1e-12)) > z_thresh
+
+    freqs, psd = compute_psd(data, sfreq)
+    distance = np.abs(freqs - powerline)
+    line = distance <= 1.0
+    neighbours = (distance >= 2.0) & (distance <= 5.0)
+    if line.any() and neighbours.any():
+        ratio = psd[:, line].max(axis=-1) / (np.median(psd[:, neighbours], axis=-1) + 1e-30)
+        masks["line_noise"] = (_robust_z(np.log(ratio + 1e-12)) > z_thresh) & (ratio > line_ratio) \
+            & ~masks["flat"]
+    else:
+        masks["line_noise"] = np.zeros(len(std), dtype=bool)
+
+    masks["bad"] = masks["flat"] | masks["clipped"] | masks["noisy"] | masks["line_noise"]
+    return masks
+
+
+def detect_bad_epochs(epochs, channel_mask=None, flat_ratio=0.01, z_thresh=5.0, max_ptp=None,
+                      batch=64):
+    """
+    Reject mask (epochs,) for an (epochs x channels x samples) view from
+    make_epochs(). Per-epoch statistics are computed from the view batch
+    epochs at a time, so the overlapping stack is never copied whole; only
+    channels with channel_mask True are then considered.
+
+    An epoch is rejected when a channel is flat in it, when its log-std is
+    a robust outlier (z > z_thresh) against that channel's other epochs,
+    or when its peak-to-peak amplitude exceeds max_ptp.
+    """
+    n_epochs = epochs.shape[0]
+    std = np.empty(epochs.shape[:2])  # (epochs, channels)
+    ptp = np.empty(epochs.shape[:2]) if max_ptp is not None else None
+    for start in range(0, n_epochs, batch):
+        block = epochs[start:start + batch]
+        std[start:start + batch] = block.std(axis=-1)
+        if ptp is not None:
+            ptp[start:start + batch] = np.ptp(block, axis=-1)
+
+    if channel_mask is not None:
+        good = np.asarray(channel_mask, dtype=bool)
+        std = std[:, good]
+        ptp = ptp[:, good] if ptp is not None else None
+    if n_epochs == 0 or std.shape[1] == 0:
+        return np.zeros(n_epochs, dtype=bool)
+
+    reject = (std <= flat_ratio * np.median(std, axis=0)).any(axis=-1)
+    reject |= (_robust_z(np.log(std + 1e-12), axis=0) > z_thresh).any(axis=-1)
+    if ptp is not None:
+        reject |= (ptp > max_ptp).any(axis=-1)
+    return reject
@@ -0,0 +1,124 @@
+# backend/core/running_psd.py
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import fft
+from scipy.signal import get_window
+
+from core.feature_extraction import BANDS, WELCH_NPERSEG, channel_band_powers
+
+
+class RunningPSD:
+    """
+    Welch PSD of the last window_sec seconds of a live stream, updated
+    incrementally. Each completed segment's periodogram goes into a ring;
+    its contribution is added to a running sum and the oldest one is
+    subtracted, so an update costs O(segment) however long the window is.
+
+    With window_sec=None every segment since reset() is averaged, which
+    streams the Welch PSD of a whole recording in constant memory.
+
+    The result equals extract_features() with the same nperseg/noverlap
+    over the n_covered samples that end n_pending samples before the
+    newest one (those have not completed a segment yet). A smaller
+    noverlap hop gives more frequent updates.
+    """
+
+    def __init__(self, n_channels, sfreq, window_sec=4.0, nperseg=None, noverlap=None):
+        if window_sec is None:
+            self.nperseg = nperseg or WELCH_NPERSEG
+        else:
+            window = int(round(window_sec * sfreq))
+            self.nperseg = nperseg or min(WELCH_NPERSEG, window)
+        noverlap = self.nperseg // 2 if noverlap is None else noverlap
+        self.hop = self.nperseg - noverlap
+        self.n_segments = None if window_sec is None else \
+            max(1, (window - self.nperseg) // self.hop + 1)
+
+        self.sfreq = sfreq
+        self.taper = get_window("hann", self.nperseg)
+        self.scale = 1.0 / (sfreq * np.sum(self.taper ** 2))
+        self.freqs = fft.rfftfreq(self.nperseg, 1.0 / sfreq)
+
+        self.n_channels = n_channels
+        self.ring = None if self.n_segments is None else \
+            np.zeros((self.n_segments, n_channels, len(self.freqs)))
+        self.reset()
+
+    def reset(self):
+        if self.ring is not None:
+            self.ring[:] = 0
+        self.total = np.zeros((self.n_channels, len(self.freqs)))
+        self.pos = 0
+        self.filled = 0
+        self.pending = np.zeros((self.n_channels, 0))
+
+    def _periodograms(self, segments):
+        segments = segments - segments.mean(axis=-1, keepdims=True)  # detrend="constant"
+        spectrum = fft.rfft(segments * self.taper, axis=-1)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2) * self.scale
+        power[..., 1:] *= 2
+        if self.nperseg % 2 == 0:
+            power[..., -1] /= 2  # Nyquist bin is not mirrored
+        return power
+
+    def update(self, block):
+        """
+        block: (channels x samples) of new (filtered) data
+        """
+        self.pending = np.concatenate([self.pending, np.asarray(block, dtype=np.float64)], axis=1)
+        if self.pending.shape[1] < self.nperseg:
+            return self
+
+        segments = sliding_window_view(self.pending, self.nperseg, axis=-1)[:, ::self.hop]
+        powers = self._periodograms(segments.transpose(1, 0, 2))  # one batched FFT
+        self.pending = self.pending[:, len(powers) * self.hop:]
+        if self.ring is None:  # unbounded window: plain running sum
+            self.total += powers.sum(axis=0)
+            self.filled += len(powers)
+            return self
+
+        for power in powers[-self.n_segments:]:
+            if self.filled == self.n_segments:
+                self.total -= self.ring[self.pos]
+            self.ring[self.pos] = power
+            self.total += power
+            self.filled = min(self.filled + 1, self.n_segments)
+            self.pos = (self.pos + 1) % self.n_segments
+            if self.pos == 0:
+                self.total = self.ring[:self.filled].sum(axis=0)  # drop rounding drift
+        return self
+
+    @property
+    def n_covered(self):
+        """
+        Number of samples spanned by the segments in the ring
+        """
+        return 0 if self.filled == 0 else (self.filled - 1) * self.hop + self.nperseg
+
+    @property
+    def n_pending(self):
+        """
+        Newest samples received but not yet part of a segment
+        """
+        if self.filled == 0:
+            return self.pending.shape[1]
+        return self.pending.shape[1] - (self.nperseg - self.hop)  # pending starts at the overlap
+
+    @property
+    def psd(self):
+        """
+        (freqs, (channels x freqs) PSD), or None before the first segment
+        """
+        if self.filled == 0:
+            return None
+        return self.freqs, self.total / self.filled
+
+    def band_powers(self, bands=BANDS):
+        """
+        (1, bands) grand-mean band powers, like extract_features()
+        """
+        if self.filled == 0:
+            return None
+        freqs, psd = self.psd
+        return channel_band_powers(freqs, psd, bands).mean(axis=-2).reshape(1, -1)
@@ -0,0 +1,104 @@
+# backend/device/eeg_stream.py
+
+import os
+import sys
+
+import numpy as np
+
+# Signal-processing code shared with the training pipeline lives in src/
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from config import DTYPE, LOW_CUTOFF, HIGH_CUTOFF, FILTER_ORDER
+from core.asr import ASRStream
+from core.preprocessing import design_filter_cascade
+from core.running_psd import RunningPSD
+from src.preprocessing import StreamingFilter
+
+
+class EEGStream:
+    """
+    Real-time preprocessing of device data. Blocks of any size go through
+    the configured band-pass + notch cascade, with filter state carried
+    across blocks, and are kept in a ring buffer of the last buffer_sec
+    seconds. With an ASR calibration (core.asr.get_calibration) the
+    filtered data is also ASR-cleaned, which delays output by one window.
+    Band powers over the last psd_window_sec seconds are kept up to date
+    every update_sec seconds by a RunningPSD, with the Welch layout in
+    psd_params; extract_features(stream.psd_window(), **stream.psd_params)
+    gives the same values as band_powers().
+    """
+
+    def __init__(self, n_channels, sfreq, buffer_sec=10.0, lowcut=LOW_CUTOFF,
+                 highcut=HIGH_CUTOFF, order=FILTER_ORDER, asr_calibration=None,
+                 psd_window_sec=4.0, update_sec=0.25):
+        self.n_channels = n_channels
+        self.sfreq = sfreq
+        sos = design_filter_cascade(float(sfreq), lowcut, highcut, order=order)
+        self.filter = StreamingFilter(n_channels, sfreq, sos=sos, dtype=DTYPE, warm_start=True)
+        self.asr = None if asr_calibration is None else \
+            ASRStream(asr_calibration, n_channels, sfreq)
+        nperseg = min(int(2 * sfreq), int(psd_window_sec * sfreq))
+        self.psd_params = {"nperseg": nperseg,
+                           "noverlap": nperseg - max(1, int(update_sec * sfreq))}
+        self.spectrum = RunningPSD(n_channels, sfreq, psd_window_sec, **self.psd_params)
+        self.buffer = np.zeros((n_channels, int(buffer_sec * sfreq)), dtype=DTYPE)
+        self.pos = 0       # next write index in the ring
+        self.n_seen = 0    # total samples received
+
+    def push(self, block):
+        """
+        block: (channels x samples) raw device samples.
+        Returns the filtered (and cleaned) samples.
+        """
+        filtered = self.filter.process(block)
+        if self.asr is not None:
+            filtered = self.asr.process(filtered)
+        self.spectrum.update(filtered)
+        size = self.buffer.shape[1]
+        n = filtered.shape[1]
+
+        if n >= size:
+            self.buffer[:] = filtered[:, -size:]
+            self.pos = 0
+        else:
+            first = min(n, size - self.pos)
+            self.buffer[:, self.pos:self.pos + first] = filtered[:, :first]
+            self.buffer[:, :n - first] = filtered[:, first:]
+            self.pos = (self.pos + n) % size
+
+        self.n_seen += n
+        return filtered
+
+    def latest(self, n_samples=None):
+        """
+        Most recent filtered samples in time order, as a (data, sfreq)
+        tuple ready for extract_features()
+        """
+        size = self.buffer.shape[1]
+        n = min(n_samples or size, size, self.n_seen)
+        idx = (self.pos - n + np.arange(n)) % size
+        return self.buffer[:, idx], self.sfreq
+
+    def psd_window(self):
+        """
+        The filtered samples behind band_powers(), as a (data, sfreq) tuple
+        """
+        covered, pending = self.spectrum.n_covered, self.spectrum.n_pending
+        data, sfreq = self.latest(covered + pending)
+        return data[:, :covered], sfreq
+
+    def band_powers(self):
+        """
+        Latest (1, bands) band powers, or None until enough data arrived.
+        Same values as extract_features(self.psd_window(), **self.psd_params)
+        """
+        return self.spectrum.band_powers()
+
+    def reset(self):
+        self.filter.reset()
+        self.spectrum.reset()
+        if self.asr is not None:
+            self.asr = ASRStream(self.asr.calibration, self.n_channels, self.sfreq)
+        self.buffer[:] = 0
+        self.pos = 0
+        self.n_seen = 0
@@ -1,11 +1,83 @@
 # input/dataset_loader.py
 
 import mne
+from scipy.signal import resample_poly
 
-def load_dataset_file(file_path):
+from config import DTYPE
+from core.preprocessing import resample_factors
+
+
+def load_dataset_file(file_path, preload=True):
     """
     Load EEG EDF file
     """
 
-    raw = mne.io.read_raw_edf(file_path, preload=True)
-    return raw
\ No newline at end of file
+    raw = mne.io.read_raw_edf(file_path, preload=preload, verbose="error")
+    return raw
+
+
+class LazyEDFSource:
+    """
+    EDF recording that reads samples from disk only when asked.
+    Windows come back as (data, sfreq) tuples at the rate in the EDF
+    header, the same shape as load_data(), so they feed straight into
+    resample_data(), filter_data() and extract_features().
+    """
+
+    def __init__(self, file_path, picks=None, dtype=DTYPE):
+        self.raw = load_dataset_file(file_path, preload=False)
+        self.dtype = dtype
+        self.sfreq = self.raw.info["sfreq"]
+        self.ch_names = list(picks) if picks is not None else list(self.raw.ch_names)
+        self.n_times = self.raw.n_times
+
+    @property
+    def shape(self):
+        return len(self.ch_names), self.n_times
+
+    def get_window(self, start, stop):
+        """
+        (channels x samples) for samples [start, stop)
+        """
+        data = self.raw.get_data(picks=self.ch_names, start=start, stop=stop)
+        return data.astype(self.dtype, copy=False), self.sfreq
+
+    def iter_epochs(self, epoch_sec=30.0, overlap_sec=0.0):
+        """
+        Yield consecutive (data, sfreq) windows of epoch_sec seconds.
+        Only one window is held in memory at a time.
+        """
+        size = int(round(epoch_sec * self.sfreq))
+        step = size - int(round(overlap_sec * self.sfreq))
+        if size <= 0 or step <= 0:
+            raise ValueError("❌ epoch_sec must be positive and larger than overlap_sec")
+        for start in range(0, self.n_times - size + 1, step):
+            yield self.get_window(start, start + size)
+
+    def iter_blocks(self, block_sec=30.0, target_sfreq=None):
+        """
+        Yield consecutive (data, sfreq) blocks covering the whole recording,
+        the last one possibly shorter. With target_sfreq every block is
+        resampled with enough context read on both sides that the blocks
+        join up exactly to resample_data() of the whole recording.
+        """
+        if target_sfreq is None or target_sfreq == self.sfreq:
+            up = down = 1
+        else:
+            up, down = resample_factors(self.sfreq, target_sfreq)
+        # blocks start on multiples of down, where the output grid restarts
+        size = max(1, int(round(block_sec * self.sfreq)) // down) * down
+        # resample_poly's filter reaches 10 * max(up, down) upsampled samples out
+        pad = 0 if up == down else -(-(10 * max(up, down) // up + 2) // down) * down
+
+        for start in range(0, self.n_times, size):
+            stop = min(start + size, self.n_times)
+            if up == down:
+                yield self.get_window(start, stop)
+                continue
+            lo, hi = max(0, start - pad), min(self.n_times, stop + pad)
+            data, _ = self.get_window(lo, hi)
+            data = resample_poly(data, up, down, axis=-1)
+            first = (start - lo) * up // down
+            n_out = -(-stop * up // down) - start * up // down
+            yield data[:, first:first + n_out].astype(self.dtype, copy=False), target_sfreq
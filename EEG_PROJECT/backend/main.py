@@ -1,15 +1,119 @@
 # backend/main.py
 
 import os
-from core.preprocessing import preprocess_data   # Excel/CSV compatible
-from core.feature_extraction import extract_features
+import sys
+import numpy as np
+import config
+from core.preprocessing import load_data, resample_data, filter_data, design_filter_cascade   # Excel/CSV compatible
+from core.feature_extraction import BANDS, extract_features
+from core.quality import detect_bad_channels
+from core.running_psd import RunningPSD
+from core import asr
+from utils import feature_cache
+
+# Signal-processing code shared with the training pipeline lives in src/
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from src.preprocessing import StreamingFilter
 from models.predict import predict
 from models.risk import calculate_risk
 
-def run_pipeline(mode, source=None):
+PIPELINE_VERSION = 3  # part of the feature-cache key; bump when the chain changes
+EDF_BLOCK_SEC = 30.0  # EDF recordings are read this many seconds at a time
+
+
+def _pipeline_params(sfreq, session):
+    # Everything between the raw signal and the features; part of the
+    # feature-cache key, so a change to any of it recomputes
+    return {
+        "version": PIPELINE_VERSION,
+        "sfreq": sfreq,
+        "dtype": config.DTYPE,
+        "target_sfreq": config.CANONICAL_SFREQ,
+        "filter": [config.LOW_CUTOFF, config.HIGH_CUTOFF, config.POWERLINE_FREQ,
+                   config.FILTER_ORDER, config.NOTCH_Q, config.NOTCH_HARMONICS],
+        "asr": None if session is None else [session, config.ASR_CUTOFF, config.ASR_WINDOW_SEC],
+        "features": {"bands": BANDS, "mode": "mean", "psd": "welch"},
+    }
+
+
+def _good_channels(data, sfreq):
+    # Judged on the unfiltered signal at the file's own rate: the
+    # resampling low-pass, the notches and ASR would hide line noise and
+    # smooth away clipping plateaus
+    bad = detect_bad_channels(data, sfreq)["bad"]
+    if bad.any() and not bad.all():
+        print("⚠️ Bad channels excluded:", np.flatnonzero(bad).tolist())
+        return ~bad
+    return np.ones(len(bad), dtype=bool)
+
+
+def _dataset_features(data, sfreq, session=None):
+    good = _good_channels(data, sfreq)
+    data, sfreq = resample_data(data, sfreq)
+    data = filter_data(data, sfreq)
+    print("✅ Band-pass + notch filters applied")
+    if session is not None:
+        # bad channels would distort the calibration; they are left as-is
+        calibration = asr.get_calibration(session, data[good], sfreq)
+        data[good] = asr.clean(data[good], sfreq, calibration)
+        print("✅ Artifact subspace reconstruction applied")
+    print("🔄 Feature extraction in progress...")
+    return extract_features((data, sfreq), channel_mask=None if good.all() else good)
+
+
+def _edf_features(source, session=None):
+    """
+    The features of _dataset_features() on a whole EDF recording, read
+    EDF_BLOCK_SEC seconds at a time. Resampling is exact across blocks,
+    filter state is carried from block to block and the Welch PSD is
+    accumulated over every segment, so no block boundary shows up in the
+    result. Recordings of one block or less are processed in one go.
+    """
+    from input.dataset_loader import LazyEDFSource
+    edf = LazyEDFSource(source)
+    if edf.n_times <= EDF_BLOCK_SEC * edf.sfreq:
+        return _dataset_features(*edf.get_window(0, edf.n_times), session)
+
+    sfreq = config.CANONICAL_SFREQ
+    blocks = lambda: edf.iter_blocks(EDF_BLOCK_SEC, sfreq)
+
+    # Pass 1: a channel is bad when flagged in most native-rate blocks of
+    # the unfiltered signal
+    votes = np.mean([detect_bad_channels(*block)["bad"] for block in edf.iter_blocks(EDF_BLOCK_SEC)],
+                    axis=0)
+    bad = votes > 0.5
+    if bad.any() and not bad.all():
+        print("⚠️ Bad channels excluded:", np.flatnonzero(bad).tolist())
+        good = ~bad
+    else:
+        good = np.ones(len(bad), dtype=bool)
+
+    # Pass 2: filter (and ASR-clean) the good channels and accumulate their PSD
+    n_good = int(good.sum())
+    streaming_filter = StreamingFilter(n_good, sfreq, sos=design_filter_cascade(float(sfreq)),
+                                       dtype=config.DTYPE)
+    spectrum = RunningPSD(n_good, sfreq, window_sec=None)
+    cleaner = None
+    for data, _ in blocks():
+        data = streaming_filter.process(data[good])
+        if session is not None:
+            if cleaner is None:  # calibrate on the first block unless cached
+                calibration = asr.get_calibration(session, data, sfreq)
+                cleaner = asr.ASRStream(calibration, n_good, sfreq)
+            data = cleaner.process(data)
+        spectrum.update(data)
+    print("✅ Band-pass + notch filters applied")
+    if cleaner is not None:
+        print("✅ Artifact subspace reconstruction applied")
+    return spectrum.band_powers()
+
+
+def run_pipeline(mode, source=None, session=None):
     """
     mode: "device" or "dataset"
     source: file path if dataset, else None
+    session: subject/session id; when given, the data is ASR-cleaned with
+             that session's cached calibration (computed on first use)
     """
     if mode == "device":
         # Dummy device mode
@@ -24,12 +128,18 @@ def run_pipeline(mode, source=None):
     elif mode == "dataset":
         print(f"📂 Dataset file path: {source}")
 
-        # Step 1: Preprocess dataset
-        raw = preprocess_data(source)  # returns (data, sfreq) tuple
-        print("🔄 Feature extraction in progress...")
-
-        # Step 2: Extract features
-        features = extract_features(raw)
+        if source.lower().endswith(".edf"):
+            # Step 1+2: Stream the EDF from disk block by block
+            print("🔄 Feature extraction in progress...")
+            features = _edf_features(source, session)
+        else:
+            # Step 1+2: Preprocess and extract features, or reuse the
+            # features of an identical signal analysed with the same settings
+            data, sfreq = load_data(source)
+            features = feature_cache.cached(
+                data, _pipeline_params(sfreq, session),
+                lambda: _dataset_features(data, sfreq, session))
+            print("📦 Feature cache:", feature_cache.stats())
         print("⚡ Features extracted:", features)
 
         # Step 3: Make prediction
@@ -64,7 +174,7 @@ if __name__ == "__main__":
         source = None
     elif choice == "2":
         mode = "dataset"
-        file_path = input("Enter EEG dataset file path (CSV or XLSX): ").strip().strip('"')
+        file_path = input("Enter EEG dataset file path (CSV, XLSX or EDF): ").strip().strip('"')
         source = file_path
     else:
         print("❌ Invalid choice, defaulting to device")
@@ -0,0 +1,118 @@
+# backend/utils/feature_cache.py
+#
+# Memoized features: an in-process LRU in front of an optional on-disk
+# tier, keyed by the content of the raw signal and the parameters of
+# everything computed from it.
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from config import FEATURE_CACHE_DIR, FEATURE_CACHE_SIZE
+from utils.helpers import array_hash, params_hash
+
+_memory = OrderedDict()  # key -> read-only features, most recently used last
+_stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+_lock = threading.Lock()  # Streamlit runs every session on its own thread
+
+
+def cache_key(data, params):
+    """
+    Key of the features of raw array data under pipeline params (a
+    JSON-serializable dict of everything that affects the result)
+    """
+    return f"{array_hash(data)}-{params_hash(params)}"
+
+
+def _path(key, cache_dir):
+    return os.path.join(cache_dir, f"{key}.npy")
+
+
+def lookup(key, cache_dir=FEATURE_CACHE_DIR):
+    """
+    Cached features, or None on a miss in both tiers
+    """
+    with _lock:
+        features = _memory.get(key)
+        if features is not None:
+            _memory.move_to_end(key)
+            _stats["hits"] += 1
+            return features
+
+    if cache_dir:
+        try:
+            features = np.load(_path(key, cache_dir))
+        except (OSError, ValueError):
+            pass
+        else:
+            with _lock:
+                _stats["disk_hits"] += 1
+            return _remember(key, features)
+
+    with _lock:
+        _stats["misses"] += 1
+    return None
+
+
+def _remember(key, features, max_items=FEATURE_CACHE_SIZE):
+    features = np.array(features)  # private copy, frozen below
+    features.flags.writeable = False
+    with _lock:
+        _memory[key] = features
+        _memory.move_to_end(key)
+        while len(_memory) > max_items:
+            _memory.popitem(last=False)
+    return features
+
+
+def store(key, features, cache_dir=FEATURE_CACHE_DIR):
+    """
+    Save features in memory and (when cache_dir is set) on disk;
+    returns the read-only cached copy
+    """
+    features = _remember(key, features)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        path = _path(key, cache_dir)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, features)
+        os.replace(tmp, path)  # readers never see a partial file
+    return features
+
+
+def cached(data, params, compute, cache_dir=FEATURE_CACHE_DIR):
+    """
+    compute() on a miss, the stored result on a hit. data is the raw
+    signal the features derive from; params describe how.
+    """
+    key = cache_key(data, params)
+    features = lookup(key, cache_dir)
+    if features is None:
+        features = store(key, compute(), cache_dir)
+    return features
+
+
+def stats():
+    """
+    Hit/miss counters and the number of entries held in memory
+    """
+    with _lock:
+        return dict(_stats, size=len(_memory))
+
+
+def clear(cache_dir=None):
+    """
+    Drop the in-memory tier and reset the counters; also delete the
+    on-disk entries when cache_dir is given
+    """
+    with _lock:
+        _memory.clear()
+        for name in _stats:
+            _stats[name] = 0
+    if cache_dir and os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            if name.endswith(".npy"):
+                os.remove(os.path.join(cache_dir, name))
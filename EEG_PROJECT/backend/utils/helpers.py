@@ -0,0 +1,39 @@
+# backend/utils/helpers.py
+
+import hashlib
+import json
+
+import numpy as np
+
+
+def file_hash(file_path, block_size=1 << 20):
+    """
+    Content hash (BLAKE2b hex digest) of a file, read in blocks
+    """
+    h = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def array_hash(data, block_size=1 << 24):
+    """
+    Content hash of an array (values, shape and dtype). Memmaps are read
+    in blocks of about block_size bytes, never loaded whole.
+    """
+    data = np.asarray(data)
+    h = hashlib.blake2b(f"{data.dtype.str}{data.shape}".encode(), digest_size=20)
+    flat = data.reshape(-1) if data.flags.c_contiguous else np.ravel(data)
+    step = max(1, block_size // max(1, data.itemsize))
+    for start in range(0, flat.size, step):
+        h.update(np.ascontiguousarray(flat[start:start + step]).data)
+    return h.hexdigest()
+
+
+def params_hash(params):
+    """
+    Hash of a JSON-serializable description of pipeline parameters
+    """
+    text = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode(), digest_size=10).hexdigest()
@@ -0,0 +1,69 @@
+# backend/utils/recording_cache.py
+
+import json
+import os
+
+import numpy as np
+
+from config import CACHE_DIR, CACHE_MAX_BYTES
+
+
+def _paths(key, cache_dir=CACHE_DIR):
+    base = os.path.join(cache_dir, key)
+    return base + ".npy", base + ".json"
+
+
+def lookup(key, cache_dir=CACHE_DIR):
+    """
+    Returns (data, sfreq, ch_names) with data opened read-only as a
+    memmap, or None on a cache miss
+    """
+    npy_path, meta_path = _paths(key, cache_dir)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        data = np.load(npy_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    os.utime(npy_path)  # mark as recently used
+    return data, meta["sfreq"], meta.get("ch_names")
+
+
+def store(key, data, sfreq, ch_names=None, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """
+    Save a parsed (channels x samples) matrix and its channel names and
+    return (data, sfreq, ch_names), data reopened from the cache as a
+    read-only memmap
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    npy_path, meta_path = _paths(key, cache_dir)
+    tmp = f"{npy_path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(data))
+    os.replace(tmp, npy_path)  # readers never see a partial file
+    with open(meta_path, "w") as f:
+        json.dump({"sfreq": sfreq, "ch_names": ch_names}, f)
+    evict(cache_dir, max_bytes)
+    return np.load(npy_path, mmap_mode="r"), sfreq, ch_names
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """
+    Delete least recently used entries until the cache fits in max_bytes
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".npy"):
+            st = os.stat(os.path.join(cache_dir, name))
+            entries.append((st.st_mtime, st.st_size, name[:-4]))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, key in sorted(entries)[:-1]:  # never evict the newest entry
+        if total <= max_bytes:
+            break
+        for path in _paths(key, cache_dir):
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # already gone, or still mapped by another reader
+        total -= size
@@ -1,5 +1,4 @@
 import streamlit as st
-import numpy as np
 import pickle
 import sys
 import os
@@ -7,9 +6,10 @@ import os
 # Fix path to access src folder
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from src.preprocessing import bandpass_filter, normalize_signal
+from src.dataset_pipeline import preprocess_signal
 from src.feature_extraction import extract_features
 from src.risk_scoring import calculate_risk
+from src.signal_io import load_signal
 
 st.title("🧠 EEG-Based Schizophrenia Risk Detection")
 
@@ -23,14 +23,13 @@ else:
     uploaded_file = st.file_uploader("Upload EEG Signal (.txt)")
 
     if uploaded_file is not None:
-        signal = np.loadtxt(uploaded_file)
+        signal = load_signal(uploaded_file)
 
         st.subheader("Raw EEG Signal")
         st.line_chart(signal)
 
-        # Preprocessing
-        filtered = bandpass_filter(signal)
-        normalized = normalize_signal(filtered)
+        # Preprocessing (same dtype and filter as training)
+        normalized = preprocess_signal(signal)
 
         features = extract_features(normalized)
 
@@ -1,29 +1,192 @@
 import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
 from src.preprocessing import bandpass_filter, normalize_signal
-from src.feature_extraction import extract_features
+from src.feature_extraction import extract_features_batch
+from src.feature_store import FeatureStore
+from src.signal_io import load_signal
 
-def create_feature_dataset(data_path):
-    features = []
-    labels = []
+FEATURE_COLUMNS = ["mean", "std", "delta", "theta", "alpha", "beta"]
 
-    for file in os.listdir(data_path):
-        if file.endswith(".txt"):
-            signal = np.loadtxt(os.path.join(data_path, file))
+# Everything that changes the feature values. Bump "version" when the
+# feature code itself changes so incremental builds recompute everything.
+PIPELINE_CONFIG = {
+    "version": 2,
+    "bandpass": {"lowcut": 0.5, "highcut": 50, "fs": 256, "order": 5},
+    "features": FEATURE_COLUMNS,
+    "dtype": "float32",  # precision of the signal path; "float64" to opt in
+}
 
-            signal = bandpass_filter(signal)
-            signal = normalize_signal(signal)
+MANIFEST_FILE = "manifest.json"
+BATCH_FILES = 64  # files whose features are computed in one batched call
 
-            feature_vector = extract_features(signal)
-            features.append(feature_vector)
 
-            label = 1 if "schiz" in file.lower() else 0
-            labels.append(label)
+def subject_id(file):
+    return os.path.splitext(os.path.basename(file))[0]
 
-    df = pd.DataFrame(features, columns=[
-        "mean","std","delta","theta","alpha","beta"
-    ])
+
+def list_signal_files(data_path):
+    # Sorted so the dataset row order does not depend on the filesystem
+    return sorted(file for file in os.listdir(data_path) if file.endswith(".txt"))
+
+
+def label_of(path):
+    return 1 if "schiz" in os.path.basename(path).lower() else 0
+
+
+def preprocess_signal(signal):
+    # Shared by training and the Streamlit apps, so inference runs in the
+    # same dtype and with the same filter as the model was trained on
+    signal = np.asarray(signal).astype(PIPELINE_CONFIG["dtype"], copy=False)
+
+    signal = bandpass_filter(signal, **PIPELINE_CONFIG["bandpass"])
+    return normalize_signal(signal, inplace=True)
+
+
+def preprocess_file(path):
+    return preprocess_signal(load_signal(path))
+
+
+def process_chunk(paths):
+    # One batched PSD call for the whole chunk instead of one per file
+    signals = [preprocess_file(path) for path in paths]
+    features = extract_features_batch(signals, PIPELINE_CONFIG["bandpass"]["fs"])
+    return [(feature_vector.tolist(), label_of(path)) for feature_vector, path in zip(features, paths)]
+
+
+def process_file(path):
+    return process_chunk([path])[0]
+
+
+def process_files(paths, n_jobs=1, chunksize=None):
+    """
+    n_jobs: worker processes (None = all cores, 1 = run in this process)
+    chunksize: files per batched feature call / worker task (default: auto)
+    Results always follow the order of paths, whatever n_jobs is.
+    """
+    n_workers = 1 if n_jobs == 1 else n_jobs or os.cpu_count()
+    if chunksize is None:
+        chunksize = BATCH_FILES if n_workers == 1 else \
+            min(BATCH_FILES, max(1, len(paths) // (n_workers * 4)))
+    chunks = [paths[i:i + chunksize] for i in range(0, len(paths), chunksize)]
+
+    if n_workers == 1 or len(chunks) < 2:
+        results = list(map(process_chunk, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(process_chunk, chunks))
+    return [result for chunk in results for result in chunk]
+
+
+def create_feature_dataset(data_path, n_jobs=1, chunksize=None):
+    paths = [os.path.join(data_path, file) for file in list_signal_files(data_path)]
+    results = process_files(paths, n_jobs, chunksize)
+
+    features = [feature_vector for feature_vector, _ in results]
+    labels = [label for _, label in results]
+
+    df = pd.DataFrame(features, columns=FEATURE_COLUMNS)
     df["label"] = labels
 
-    return df
\ No newline at end of file
+    return df
+
+
+def config_hash(config=PIPELINE_CONFIG):
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_manifest(store_dir):
+    manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def manifest_rows(manifest):
+    rows = {}
+    for entry in manifest.values():
+        rows.setdefault(entry["shard"], []).append(entry["row"])
+    return {shard: sorted(idx) for shard, idx in rows.items()}
+
+
+def load_feature_dataset(store_dir, columns=None, where=None):
+    """
+    Current rows of an incremental build, read from the feature store.
+    Only the requested columns are loaded and `where` filters such as
+    {"label": 1} or {"subject": [...]} are applied inside the store.
+    """
+    manifest = load_manifest(store_dir)
+    columns = list(columns or FEATURE_COLUMNS + ["label"])
+    read_columns = ["path"] + [c for c in columns if c != "path"]
+    df = FeatureStore(store_dir).read(read_columns, where, manifest_rows(manifest))
+    return df.sort_values("path", ignore_index=True)[columns]
+
+
+def update_feature_dataset(data_path, store_dir, n_jobs=1, chunksize=None):
+    """
+    Incremental create_feature_dataset(). A manifest of
+    (size, mtime, sha1, pipeline config hash) per file is kept in store_dir
+    next to a FeatureStore, and only new files, changed files and files
+    built with a different PIPELINE_CONFIG are recomputed. Recomputed rows
+    are appended as a new shard; the manifest points at the live row of
+    every file.
+    """
+    store = FeatureStore(store_dir)
+    manifest = load_manifest(store_dir)
+    cfg = config_hash()
+
+    files = list_signal_files(data_path)
+    new_manifest = {}
+    stale = []
+    for file in files:
+        path = os.path.join(data_path, file)
+        st = os.stat(path)
+        entry = {"size": st.st_size, "mtime": st.st_mtime, "sha1": None, "config": cfg}
+        old = manifest.get(file)
+
+        if old is not None and old["config"] == cfg and "shard" in old:
+            if old["size"] == st.st_size and old["mtime"] == st.st_mtime:
+                new_manifest[file] = old
+                continue
+            if old["size"] == st.st_size:  # touched but maybe not modified
+                entry["sha1"] = file_sha1(path)
+                if entry["sha1"] == old["sha1"]:
+                    new_manifest[file] = dict(old, mtime=st.st_mtime)
+                    continue
+
+        if entry["sha1"] is None:
+            entry["sha1"] = file_sha1(path)
+        new_manifest[file] = entry
+        stale.append(file)
+
+    print(f"♻️ {len(files) - len(stale)} cached, {len(stale)} to compute")
+    results = process_files([os.path.join(data_path, f) for f in stale], n_jobs, chunksize)
+
+    if stale:
+        df = pd.DataFrame([feature_vector for feature_vector, _ in results], columns=FEATURE_COLUMNS)
+        df.insert(0, "path", stale)
+        df.insert(1, "subject", [subject_id(f) for f in stale])
+        df["label"] = np.array([label for _, label in results], dtype=np.int8)
+        shard = store.append(df)
+        for row, file in enumerate(stale):
+            new_manifest[file].update(shard=shard, row=row)
+
+    manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+    tmp = manifest_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(new_manifest, f, indent=1)
+    os.replace(tmp, manifest_path)  # an interrupted run leaves the old manifest intact
+
+    return load_feature_dataset(store_dir)
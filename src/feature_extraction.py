@@ -1,19 +1,48 @@
 import numpy as np
 from scipy.signal import welch
 
+BANDS = [(0.5, 4), (4, 8), (8, 13), (13, 30)]  # delta, theta, alpha, beta
+
+def _band_means(freqs, psd):
+    # Row-wise reductions, so a recording's features do not depend on
+    # which other recordings share its batch
+    return np.stack([psd[..., (freqs >= low) & (freqs < high)].mean(axis=-1, dtype=np.float64)
+                     for low, high in BANDS], axis=-1)
+
 def extract_band_power(signal, fs=256):
     freqs, psd = welch(signal, fs)
+    return _band_means(freqs, psd).tolist()
 
-    delta = np.mean(psd[(freqs >= 0.5) & (freqs < 4)])
-    theta = np.mean(psd[(freqs >= 4) & (freqs < 8)])
-    alpha = np.mean(psd[(freqs >= 8) & (freqs < 13)])
-    beta  = np.mean(psd[(freqs >= 13) & (freqs < 30)])
+def _stacked_features(signals, fs):
+    freqs, psd = welch(signals, fs, axis=-1)
+    mean = signals.mean(axis=-1, keepdims=True)
+    std = signals.std(axis=-1, keepdims=True)
+    return np.concatenate([mean, std, _band_means(freqs, psd)], axis=-1)
 
-    return [delta, theta, alpha, beta]
+def extract_features_batch(signals, fs=256):
+    """
+    Features of many recordings from one vectorized PSD computation.
+    signals: stacked (recordings x [channels x] samples) array, or a list
+             of recordings of any lengths (grouped by length internally);
+             the recordings must share their leading (channel) shape
+    Returns a (recordings x [channels x] 6) array with the columns of
+    extract_features.
+    """
+    if isinstance(signals, np.ndarray):
+        return _stacked_features(signals, fs)
 
-def extract_features(signal):
-    mean = np.mean(signal)
-    std = np.std(signal)
-    band_features = extract_band_power(signal)
+    signals = [np.asarray(signal) for signal in signals]
+    lead = signals[0].shape[:-1] if signals else ()
+    if any(signal.shape[:-1] != lead for signal in signals):
+        raise ValueError("All recordings must have the same number of channels")
 
-    return [mean, std] + band_features
\ No newline at end of file
+    features = np.empty((len(signals),) + lead + (2 + len(BANDS),))
+    groups = {}
+    for i, signal in enumerate(signals):
+        groups.setdefault(signal.shape[-1], []).append(i)
+    for rows in groups.values():
+        features[rows] = _stacked_features(np.stack([signals[i] for i in rows]), fs)
+    return features
+
+def extract_features(signal):
+    return extract_features_batch(np.asarray(signal)[None])[0].tolist()
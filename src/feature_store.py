@@ -0,0 +1,98 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+INDEX_FILE = "shards.json"
+STATS_COLUMNS = ("label", "subject")  # per-shard values kept for pruning
+
+
+class FeatureStore:
+    """
+    Append-only columnar feature store.
+
+    Every append() writes a new shard directory holding one typed .npy file
+    per column. Reads memory-map only the requested columns and push
+    `where` filters down: shards whose recorded label/subject values cannot
+    match are skipped without being opened.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self.shards = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.shards = json.load(f)
+
+    def _save_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.shards, f, indent=1)
+        os.replace(tmp, self.index_path)
+
+    def append(self, df):
+        """
+        Write df as a new shard and return the shard name
+        """
+        name = f"shard-{len(self.shards):05d}"
+        path = os.path.join(self.root, name)
+        os.makedirs(path, exist_ok=True)
+
+        dtypes = {}
+        for column in df.columns:
+            values = df[column].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            np.save(os.path.join(path, f"{column}.npy"), values)
+            dtypes[column] = values.dtype.str
+
+        stats = {c: sorted(set(df[c].tolist())) for c in STATS_COLUMNS if c in df}
+        self.shards.append({"name": name, "n_rows": len(df), "dtypes": dtypes, "values": stats})
+        self._save_index()
+        return name
+
+    @property
+    def columns(self):
+        return list(self.shards[-1]["dtypes"]) if self.shards else []
+
+    def _load(self, shard, column, mmap=True):
+        path = os.path.join(self.root, shard["name"], f"{column}.npy")
+        return np.load(path, mmap_mode="r" if mmap else None)
+
+    @staticmethod
+    def _may_match(shard, where):
+        for column, wanted in where.items():
+            known = shard["values"].get(column)
+            if known is not None and not set(known) & set(np.atleast_1d(wanted).tolist()):
+                return False
+        return True
+
+    def read(self, columns=None, where=None, rows=None, mmap=True):
+        """
+        columns: columns to load (default: all)
+        where: {column: value or list of accepted values}
+        rows: {shard name: row indices}; shards not listed are skipped
+        """
+        columns = list(columns or self.columns)
+        where = where or {}
+        frames = []
+
+        for shard in self.shards:
+            if rows is not None and shard["name"] not in rows:
+                continue
+            if not self._may_match(shard, where):
+                continue
+
+            sel = np.arange(shard["n_rows"]) if rows is None else np.asarray(rows[shard["name"]])
+            for column, wanted in where.items():
+                sel = sel[np.isin(self._load(shard, column, mmap)[sel], wanted)]
+            if len(sel) == 0:
+                continue
+
+            frames.append(pd.DataFrame({c: self._load(shard, c, mmap)[sel] for c in columns}))
+
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
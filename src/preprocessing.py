@@ -1,12 +1,212 @@
+from functools import lru_cache
 import numpy as np
-from scipy.signal import butter, lfilter
+from scipy.fft import next_fast_len
+from scipy.signal import butter, firwin, oaconvolve, sosfilt, sosfilt_zi
 
-def bandpass_filter(data, lowcut=0.5, highcut=50, fs=256, order=5):
-    nyq = 0.5 * fs
-    low = lowcut / nyq
-    high = highcut / nyq
-    b, a = butter(order, [low, high], btype='band')
-    return lfilter(b, a, data)
+INPLACE_BLOCK = 65536  # samples per block when filtering in place
 
-def normalize_signal(data):
-    return (data - np.mean(data)) / np.std(data)
\ No newline at end of file
+
+class FilterBank:
+    """
+    Butterworth band-pass designs in second-order sections, designed once
+    per (fs, band, order) and reused for every later call
+    """
+
+    def __init__(self):
+        self._designs = {}
+
+    def sos(self, fs, band, order=5, dtype=np.float64):
+        key = (float(fs), tuple(float(f) for f in band), int(order), np.dtype(dtype).str)
+        sos = self._designs.get(key)
+        if sos is None:
+            sos = butter(order, band, btype="band", fs=fs, output="sos").astype(dtype)
+            self._designs[key] = sos
+        return sos
+
+    def apply(self, data, fs, band, order=5, axis=-1, inplace=False):
+        """
+        Filter all channels at once along `axis`. With inplace=True the
+        float32/float64 input is overwritten block by block, so no
+        full-size temporary is allocated.
+        """
+        dtype = data.dtype if data.dtype in (np.float32, np.float64) else np.float64
+        sos = self.sos(fs, band, order, dtype)
+        if not inplace:
+            return sosfilt(sos, data, axis=axis)
+
+        view = np.moveaxis(data, axis, -1)
+        zi = np.zeros((sos.shape[0],) + view.shape[:-1] + (2,), dtype=dtype)
+        for start in range(0, view.shape[-1], INPLACE_BLOCK):
+            block = view[..., start:start + INPLACE_BLOCK]
+            block[...], zi = sosfilt(sos, block, axis=-1, zi=zi)
+        return data
+
+
+filter_bank = FilterBank()
+
+
+def bandpass_filter(data, lowcut=0.5, highcut=50, fs=256, order=5, axis=-1, inplace=False):
+    return filter_bank.apply(data, fs, (lowcut, highcut), order, axis, inplace)
+
+
+@lru_cache(maxsize=32)
+def design_fir_bandpass(lowcut, highcut, fs, numtaps=None):
+    """
+    Linear-phase FIR band-pass (Hamming window). By default the length
+    gives a transition band of min(lowcut, 2 Hz), rounded up to an odd
+    number of taps so the group delay is a whole number of samples.
+    """
+    if numtaps is None:
+        numtaps = int(np.ceil(3.3 * fs / min(lowcut, 2.0)))
+    numtaps += 1 - numtaps % 2
+    return firwin(numtaps, [lowcut, highcut], pass_zero=False, fs=fs)
+
+
+def fir_bandpass_filter(data, lowcut=0.5, highcut=50, fs=256, numtaps=None,
+                        zero_phase=True, out=None, block_size=None):
+    """
+    FIR band-pass by FFT overlap-add, for long recordings.
+
+    The time axis (last) is processed in blocks of block_size samples
+    (default: about 8x the filter length, rounded to a fast FFT size), so
+    data and out may be np.memmap arrays far larger than RAM. zero_phase
+    removes the (numtaps - 1) / 2 sample group delay of the filter.
+    """
+    h = design_fir_bandpass(float(lowcut), float(highcut), float(fs), numtaps)
+    taps = len(h)
+    n = data.shape[-1]
+    if block_size is None:
+        block_size = next_fast_len(8 * taps) - taps + 1
+    shift = (taps - 1) // 2 if zero_phase else 0
+
+    dtype = data.dtype if data.dtype in (np.float32, np.float64) else np.float64
+    if out is None:
+        out = np.zeros(data.shape, dtype=dtype)
+    else:
+        out[...] = 0
+    kernel = h.astype(dtype).reshape((1,) * (data.ndim - 1) + (taps,))
+
+    for start in range(0, n, block_size):
+        block = np.asarray(data[..., start:start + block_size], dtype=dtype)
+        y = oaconvolve(block, kernel, mode="full", axes=-1)
+        # y[j] belongs at output sample start + j - shift
+        lo = start - shift
+        first = max(0, -lo)
+        stop = min(n, lo + y.shape[-1])
+        out[..., lo + first:stop] += y[..., first:stop - lo]
+    return out
+
+
+class StreamingFilter:
+    """
+    Band-pass filter for live data. The SOS state of every channel is kept
+    between calls, so feeding a signal block by block gives the same output
+    as filtering it in one go, with O(block) work per call.
+    warm_start: start from the steady state of the first sample instead of
+    zero, which avoids the onset transient of signals with a DC offset.
+    """
+
+    def __init__(self, n_channels, fs, lowcut=0.5, highcut=50, order=5,
+                 sos=None, dtype=np.float64, warm_start=False):
+        self.sos = filter_bank.sos(fs, (lowcut, highcut), order, dtype) if sos is None \
+            else np.asarray(sos, dtype=dtype)
+        self.n_channels = n_channels
+        self.warm_start = warm_start
+        self.zi = None
+
+    def reset(self):
+        self.zi = None
+
+    def process(self, block):
+        """
+        block: (channels x samples) -> filtered block of the same shape
+        """
+        block = np.asarray(block, dtype=self.sos.dtype).reshape(self.n_channels, -1)
+        if self.zi is None:
+            self.zi = np.zeros((self.sos.shape[0], self.n_channels, 2), dtype=self.sos.dtype)
+            if self.warm_start and block.shape[1]:
+                self.zi[...] = sosfilt_zi(self.sos)[:, None, :] * block[None, :, :1]
+        out, self.zi = sosfilt(self.sos, block, axis=-1, zi=self.zi)
+        return out
+
+
+class OnlineNormalizer:
+    """
+    Per-channel z-scoring from running statistics. Mean and variance are
+    accumulated chunk by chunk (Welford, merged with Chan et al.'s
+    parallel update), so chunked or live data never has to be buffered.
+    Call freeze() after a calibration period to keep its statistics fixed.
+    """
+
+    def __init__(self, n_channels=1):
+        self.count = 0
+        self.mean = np.zeros(n_channels)
+        self.m2 = np.zeros(n_channels)
+        self.frozen = False
+
+    def update(self, chunk):
+        """
+        chunk: (channels x samples), or 1-D for a single channel
+        """
+        chunk = np.asarray(chunk).reshape(len(self.mean), -1)
+        n = chunk.shape[-1]
+        if self.frozen or n == 0:
+            return self
+        mean = chunk.mean(axis=-1)
+        m2 = ((chunk - mean[:, None]) ** 2).sum(axis=-1)
+        return self._merge(n, mean, m2)
+
+    def merge(self, other):
+        """
+        Combine the statistics of a normalizer fitted on other data
+        """
+        return self._merge(other.count, other.mean, other.m2)
+
+    def _merge(self, n, mean, m2):
+        total = self.count + n
+        if total == 0:
+            return self
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (n / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+        return self
+
+    def freeze(self):
+        self.frozen = True
+        return self
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / max(self.count, 1))
+
+    def transform(self, chunk, inplace=False):
+        """
+        Normalize chunk with the current statistics. inplace=True writes
+        into a float chunk instead of allocating the result.
+        """
+        shape = np.shape(chunk)
+        out = chunk if inplace else np.array(chunk, dtype=np.result_type(chunk, np.float32))
+        view = out.reshape(len(self.mean), -1)
+        view -= self.mean[:, None].astype(out.dtype)
+        view /= self.std[:, None].astype(out.dtype)
+        return out.reshape(shape)
+
+    def update_transform(self, chunk, inplace=False):
+        """
+        Streaming step: fold chunk into the statistics (unless frozen),
+        then normalize it
+        """
+        return self.update(chunk).transform(chunk, inplace)
+
+
+def normalize_signal(data, inplace=False):
+    mean = np.mean(data)
+    std = np.std(data)
+    if inplace:
+        data -= mean
+        data /= std
+        return data
+    out = data - mean  # single full-size temporary
+    out /= std
+    return out
@@ -0,0 +1,53 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+
+SIDECAR_SUFFIX = ".npy"
+
+
+def _sniff_delimiter(text):
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        for delimiter in (",", ";", "\t"):
+            if delimiter in line:
+                return delimiter
+        break
+    return r"\s+"
+
+
+def parse_signal(raw):
+    """
+    Parse a numeric text signal (bytes) with the pandas C parser.
+    Returns the same array as np.loadtxt: 0-d for a single value, 1-D for
+    a single column or row, (rows x columns) otherwise.
+    """
+    delimiter = _sniff_delimiter(raw[:4096].decode("utf-8", errors="ignore"))
+    df = pd.read_csv(io.BytesIO(raw), sep=delimiter, header=None, comment="#",
+                     dtype=np.float64, engine="c", float_precision="round_trip")
+    return np.squeeze(df.to_numpy())  # drop length-1 axes like np.loadtxt
+
+
+def load_signal(source, sidecar=False):
+    """
+    Fast replacement for np.loadtxt on .txt EEG signals.
+
+    source: file path or file-like object (e.g. a Streamlit upload)
+    sidecar: for paths, also save a binary <file>.npy next to the text
+             file; later loads use it while it is newer than the text
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        raw = source.read()
+        return parse_signal(raw.encode() if isinstance(raw, str) else raw)
+
+    npy_path = os.fspath(source) + SIDECAR_SUFFIX
+    if os.path.exists(npy_path) and os.path.getmtime(npy_path) >= os.path.getmtime(source):
+        return np.load(npy_path)
+
+    with open(source, "rb") as f:
+        signal = parse_signal(f.read())
+    if sidecar:
+        np.save(npy_path, signal)
+    return signal
@@ -1,9 +1,9 @@
 import streamlit as st
-import numpy as np
 import pickle
-from src.preprocessing import bandpass_filter, normalize_signal
+from src.dataset_pipeline import preprocess_signal
 from src.feature_extraction import extract_features
 from src.risk_scoring import calculate_risk
+from src.signal_io import load_signal
 
 model = pickle.load(open("../models/trained_model.pkl", "rb"))
 
@@ -12,13 +12,12 @@ st.title("🧠 EEG-Based Schizophrenia Risk Detection")
 uploaded_file = st.file_uploader("Upload EEG Signal (.txt)")
 
 if uploaded_file:
-    signal = np.loadtxt(uploaded_file)
+    signal = load_signal(uploaded_file)
 
     st.subheader("Raw EEG Signal")
     st.line_chart(signal)
 
-    signal = bandpass_filter(signal)
-    signal = normalize_signal(signal)
+    signal = preprocess_signal(signal)
 
     features = extract_features(signal)
 
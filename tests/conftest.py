@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# src/ is imported as a package from the repo root; the backend imports
+# its modules (config, core, utils) from its own directory
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "EEG_PROJECT", "backend"))
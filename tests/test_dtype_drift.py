@@ -0,0 +1,84 @@
+"""
+The pipeline runs in float32 by default (config.DTYPE and
+PIPELINE_CONFIG["dtype"]). These tests check that float32 features stay
+within tolerance of the float64 ones and that float32 input stays float32.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import preprocessing
+from core.epoching import make_epochs
+from core.feature_extraction import extract_features, to_model_input
+from core.preprocessing import filter_data, preprocess_data, resample_data
+from src import dataset_pipeline
+from src.feature_extraction import extract_features_batch
+
+RTOL = 1e-3  # measured drift is ~1e-5; EEG needs far less precision than this
+SFREQ = 256
+
+
+@pytest.fixture
+def eeg():
+    # 8 channels x 2 min of 1/f-ish noise with an alpha rhythm and a DC offset
+    rng = np.random.default_rng(0)
+    n = 120 * SFREQ
+    t = np.arange(n) / SFREQ
+    data = np.cumsum(rng.standard_normal((8, n)), axis=-1) * 0.05 + rng.standard_normal((8, n))
+    data += 5 * np.sin(2 * np.pi * 10 * t) + 50.0
+    return data
+
+
+def _backend_features(data, dtype, **kwargs):
+    data = np.asarray(data, dtype=dtype)
+    data, sfreq = resample_data(data, 500, SFREQ)
+    data = filter_data(data, sfreq)
+    return data, extract_features((data, sfreq), **kwargs)
+
+
+@pytest.mark.parametrize("mode", ["mean", "channel", "region"])
+def test_backend_features_drift(eeg, mode):
+    regions = {"left": [0, 1, 2, 3], "right": [4, 5, 6, 7]}
+    data32, f32 = _backend_features(eeg, np.float32, mode=mode, regions=regions)
+    data64, f64 = _backend_features(eeg, np.float64, mode=mode, regions=regions)
+
+    assert data32.dtype == np.float32 and data64.dtype == np.float64
+    assert f32.dtype == np.float32
+    np.testing.assert_allclose(f32, f64, rtol=RTOL)
+
+
+def test_epoch_features_drift(eeg):
+    data32, _ = _backend_features(eeg, np.float32)
+    data64, _ = _backend_features(eeg, np.float64)
+    f32 = extract_features((make_epochs(data32, SFREQ), SFREQ))
+    f64 = extract_features((make_epochs(data64, SFREQ), SFREQ))
+
+    assert f32.dtype == np.float32
+    np.testing.assert_allclose(to_model_input(f32, batched=True),
+                               to_model_input(f64, batched=True), rtol=RTOL)
+
+
+def test_preprocess_data_drift(eeg, tmp_path, monkeypatch):
+    path = tmp_path / "recording.csv"
+    pd.DataFrame(eeg.T, columns=[f"ch{i}" for i in range(len(eeg))]).to_csv(path, index=False)
+
+    results = {}
+    for dtype in ("float32", "float64"):
+        monkeypatch.setattr(preprocessing, "DTYPE", dtype)
+        data, sfreq = preprocess_data(str(path), use_cache=False)
+        assert data.dtype == dtype
+        results[dtype] = extract_features((data, sfreq))
+    np.testing.assert_allclose(results["float32"], results["float64"], rtol=RTOL)
+
+
+def test_dataset_pipeline_drift(eeg, monkeypatch):
+    features = {}
+    for dtype in ("float32", "float64"):
+        monkeypatch.setitem(dataset_pipeline.PIPELINE_CONFIG, "dtype", dtype)
+        signals = [dataset_pipeline.preprocess_signal(channel) for channel in eeg]
+        assert all(signal.dtype == dtype for signal in signals)
+        features[dtype] = extract_features_batch(signals, SFREQ)
+
+    # column 0 is the mean of a z-scored signal, ~0: compare it absolutely
+    np.testing.assert_allclose(features["float32"][:, 0], features["float64"][:, 0], atol=1e-5)
+    np.testing.assert_allclose(features["float32"][:, 1:], features["float64"][:, 1:], rtol=RTOL)